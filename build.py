@@ -1,64 +1,251 @@
 import os
 import json
+import time
+import hashlib
+import argparse
 from datetime import datetime
-from scripts.fetch_pubmed import fetch_works
-from scripts.fetch_youtube import fetch_videos
-from jinja2 import Environment, FileSystemLoader
+from scripts import scheduler, trace
+from scripts.sources import SOURCES, register_source, run_sources, load_cached, print_report
+from scripts.themes import THEMES
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
 OUTPUT_DIR = BASE_DIR
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
+CSS_FILE = os.path.join(STATIC_DIR, 'css', 'style.css')
+JS_FILE = os.path.join(STATIC_DIR, 'js', 'search.js')
+# Site-relative path of the generated search index (published fingerprinted)
+SEARCH_INDEX = 'static/search/index.json'
+# Content hashes of the last rendered inputs, committed alongside index.html
+MANIFEST_FILE = os.path.join(BASE_DIR, 'data', 'build_manifest.json')
 
-def build_site():
-    print("Starting site build...")
-    
-    # 1. Fetch Data
-    print("Fetching Publications (PubMed)...")
-    publications = fetch_works()
-    
-    print("Fetching YouTube Videos...")
+# Source functions import their modules on first use, so a render-only build
+# never loads requests, yt-dlp or the PubMed client.
+def fetch_publications():
+    from scripts.fetch_pubmed import fetch_works
+    from scripts.fetch_orcid import fetch_orcid_works
+    # ORCID runs second so its works are deduplicated against fresh PubMed records
+    fetch_works()
+    return fetch_orcid_works()
+
+def cached_publications():
+    from scripts.store import load_works
+    return load_works()
+
+def fetch_playlist():
+    from scripts.fetch_youtube import fetch_videos
+    from scripts.thumbnails import download_thumbnails
     videos = fetch_videos()
-    
-    # 2. Prepare Context
-    context = {
-        "publications": publications,
+    # Downloads stay under this source's deadline rather than the render stage
+    with trace.span("thumbnails.download"):
+        download_thumbnails(videos)
+    return videos
+
+def cached_videos():
+    from scripts.fetch_youtube import load_cached_videos
+    return load_cached_videos()
+
+# Data sources fetched concurrently by build_site. Deadlines are seconds from
+# the start of the fetch stage; on overrun the cached data is used instead.
+register_source("publications", fetch_publications, deadline=180, fallback=cached_publications)
+register_source("videos", fetch_playlist, deadline=90, fallback=cached_videos)
+
+AUTHOR = {
+    "name": "안상진 (Sangzin Ahn)",
+    "title": "인제대학교 의과대학 약리학교실 부교수",
+    "affiliation": "Associate Professor, Dept. of Pharmacology, Inje Univ. College of Medicine",
+    "research_interests": [
+        "의학교육에서 대형언어모델 활용 (LLMs in Medical Education)",
+        "의학연구에서 대형언어모델 적용 (LLM application in Medical Research)"
+    ],
+    "education": [
+        "2016.03-현재: 인제대학교 의과대학 약리학교실 교수",
+        "2009.03-2016.02: 의학박사 - 서울대학교 의과학과 약리학 전공(석박통합과정)",
+        "2003.03-2009.02: 의학사 - 서울대학교 의과대학"
+    ],
+    "announcement": "정말 죄송하게도 <u>경남 일대를 제외한 지역</u>은 오가면서 낭비되는 시간, 체력적인 부담, 지방 연자를 위한 배려가 부족한 강연료 규정 등의 여러 이유로 <u>현장강의를 고사</u>하고 있습니다. 부디 너그러운 양해 부탁드립니다.",
+    "email": "sangzinahn@gmail.com",
+    "url": "https://ahn-lab.org",
+    "scholar": "https://scholar.google.com/citations?hl=ko&user=Xe825ZgAAAAJ&view_op=list_works&sortby=pubdate",
+    "orcid": "https://orcid.org/0000-0003-2749-0014",
+    "youtube": "https://youtube.com/playlist?list=PL0TnWnPQhDj2-TOwiz_ZhY2Sdurimss2Q&si=AwUfSKzzw1Oq_PdE",
+    "blog": "https://largelearningmodel.wordpress.com/"
+}
+
+def content_hash(data):
+    """Stable hash of JSON-serializable data."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def input_hashes(publications, videos, author):
+    """Hash every input that can change the rendered page."""
+    return {
+        "publications": content_hash(publications),
+        "videos": content_hash(videos),
+        "author": content_hash(author),
+        "template": templates_hash(),
+        "css": file_hash(CSS_FILE),
+        "js": file_hash(JS_FILE)
+    }
+
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+def templates_hash():
+    """Hash of every template, so a change to an included one counts too."""
+    return content_hash({name: file_hash(os.path.join(TEMPLATE_DIR, name)) for name in sorted(os.listdir(TEMPLATE_DIR))})
+
+_env = None
+
+def get_environment():
+    global _env
+    if _env is None:
+        from jinja2 import Environment, FileSystemLoader
+        from scripts.authors import render_authors
+        from scripts.search_index import slugify
+        _env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+        _env.filters["slug"] = slugify
+        _env.filters["authors"] = render_authors
+    return _env
+
+def page_context(inline_works, shards, videos, last_updated, author=AUTHOR):
+    return {
+        "publications": inline_works,
+        "shards": shards,
         "videos": videos,
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "author": {
-            "name": "안상진 (Sangzin Ahn)",
-            "title": "인제대학교 의과대학 약리학교실 부교수",
-            "affiliation": "Associate Professor, Dept. of Pharmacology, Inje Univ. College of Medicine",
-            "research_interests": [
-                "의학교육에서 대형언어모델 활용 (LLMs in Medical Education)",
-                "의학연구에서 대형언어모델 적용 (LLM application in Medical Research)"
-            ],
-            "education": [
-                "2016.03-현재: 인제대학교 의과대학 약리학교실 교수",
-                "2009.03-2016.02: 의학박사 - 서울대학교 의과학과 약리학 전공(석박통합과정)",
-                "2003.03-2009.02: 의학사 - 서울대학교 의과대학"
-            ],
-            "announcement": "정말 죄송하게도 <u>경남 일대를 제외한 지역</u>은 오가면서 낭비되는 시간, 체력적인 부담, 지방 연자를 위한 배려가 부족한 강연료 규정 등의 여러 이유로 <u>현장강의를 고사</u>하고 있습니다. 부디 너그러운 양해 부탁드립니다.",
-            "email": "sangzinahn@gmail.com",
-            "scholar": "https://scholar.google.com/citations?hl=ko&user=Xe825ZgAAAAJ&view_op=list_works&sortby=pubdate",
-            "orcid": "https://orcid.org/0000-0003-2749-0014",
-            "youtube": "https://youtube.com/playlist?list=PL0TnWnPQhDj2-TOwiz_ZhY2Sdurimss2Q&si=AwUfSKzzw1Oq_PdE",
-            "blog": "https://largelearningmodel.wordpress.com/"
-        }
+        "last_updated": last_updated,
+        "author": author,
+        "themes": THEMES,
+        "search_index": SEARCH_INDEX
     }
+
+def render_page(context):
+    template = get_environment().get_template('index.html')
+    return template.render(context)
+
+def render_shard(shard):
+    return get_environment().get_template('pub_shard.html').render(shard=shard)
+
+def build_site(force=False, fetch=True, render=True, only=None, inline=None):
+    """Fetch data and render index.html.
+
+    ``fetch=False`` renders from cached data with no network access;
+    ``render=False`` only refreshes the caches. ``only`` limits fetching to
+    the named sources, the rest come from cache. ``inline`` is how many of
+    the newest works go into index.html (default
+    shards.INLINE_PUBLICATIONS, 0 for all); older ones are rendered as
+    per-year fragments loaded on demand. Unless ``force`` is set,
+    rendering is skipped when every input hash matches the manifest from the
+    previous build, so an unchanged week leaves index.html (and its
+    timestamp) untouched. Returns True if the page was written.
+    """
+    start = time.perf_counter()
+    print("Starting site build...")
     
-    # 3. Render Template
-    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-    template = env.get_template('index.html')
-    output_html = template.render(context)
+    # 1. Fetch Data (selected sources concurrently, the rest from cache)
+    names = list(only or SOURCES) if fetch else []
+    results = load_cached([name for name in SOURCES if name not in names])
+    if names:
+        print(f"Fetching: {', '.join(names)}...")
+        with trace.span("fetch", sources=names):
+            fetched, report = run_sources(names)
+        results.update(fetched)
+        print("Fetch stage:")
+        print_report(report)
+        scheduler.print_stats()
+    else:
+        print("Using cached data only.")
+
+    if not render:
+        print(f"Fetch finished in {time.perf_counter() - start:.2f}s.")
+        return False
+
+    written = render_site(results["publications"], results["videos"], force=force, inline=inline)
+    if written:
+        print(f"Site built successfully at {os.path.join(OUTPUT_DIR, 'index.html')} in {time.perf_counter() - start:.2f}s")
+    return written
+
+def render_site(publications, videos, author=AUTHOR, output_dir=OUTPUT_DIR, force=False, inline=None,
+                fetch_thumbnails=False):
+    """Render one site from already fetched data into ``output_dir``.
+
+    Static sources (CSS, JS) are read from this checkout; the page, its
+    fingerprinted assets and shards are written under ``output_dir``, with
+    the build manifest at MANIFEST_FILE. Missing thumbnails are only
+    downloaded with ``fetch_thumbnails`` (normally the videos source does
+    that). Returns True if the page was written.
+    """
+    start = time.perf_counter()
+
+    # Local, resized thumbnails already on disk (downloaded by the videos source)
+    from scripts.thumbnails import process_thumbnails
+    with trace.span("thumbnails"):
+        videos = process_thumbnails(videos, fetch=fetch_thumbnails)
+
+    # 2. Compare against the last build
+    output_path = os.path.join(output_dir, 'index.html')
+    from scripts import shards as sharding
+    inline = sharding.INLINE_PUBLICATIONS if inline is None else inline
+    with trace.span("hash"):
+        inputs = input_hashes(publications, videos, author)
+        inputs["inline"] = inline
+        manifest = load_manifest()
+    if not force and manifest.get("inputs") == inputs and os.path.exists(output_path):
+        trace.count("build.render_skipped")
+        print(f"No content changes since last build; skipping render ({time.perf_counter() - start:.2f}s).")
+        return False
+
+    changed = sorted(k for k in inputs if manifest.get("inputs", {}).get(k) != inputs[k])
+    print(f"Changed inputs: {', '.join(changed)}")
+
+    # 3. Older works go to per-year shards; only changed shards are rendered
+    with trace.span("shards"):
+        inline_works, shards = sharding.split_publications(publications, inline)
+        shard_files, rendered = sharding.write_shards(shards, render_shard, inputs["template"], manifest.get("shards"))
+    trace.count("build.shards_rendered", rendered)
+    trace.count("build.shards_reused", len(shards) - rendered)
+    if shards:
+        print(f"Shards: {len(inline_works)} works inline, {len(shards)} year shard(s), {rendered} re-rendered.")
+
+    # 4. Prepare Context
+    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    context = page_context(inline_works, shards, videos, last_updated, author)
     
-    # 4. Write Output
-    output_path = os.path.join(OUTPUT_DIR, 'index.html')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(output_html)
-        
-    print(f"Site built successfully at {output_path}")
+    # 5. Render Template, plus the search index over every work in page order
+    from scripts.search_index import build_index, encode_index
+    with trace.span("render"):
+        output_html = render_page(context)
+    with trace.span("search_index"):
+        search_index = encode_index(build_index(publications)).decode('utf-8')
+
+    # 6. Minify, fingerprint and precompress, then write output
+    from scripts.assets import publish, print_report as print_asset_report
+    with trace.span("publish"):
+        asset_report = publish(output_html, output_path, {SEARCH_INDEX: search_index},
+                               root=output_dir, source_root=BASE_DIR)
+    print("Assets:")
+    print_asset_report(asset_report)
+
+    save_manifest({
+        "inputs": inputs,
+        "shards": shard_files,
+        "last_updated": last_updated,
+        "output": content_hash(output_html)
+    })
+    return True
 
 if __name__ == "__main__":
     # Ensure run from website root for imports to work if running as script
@@ -66,4 +253,26 @@ if __name__ == "__main__":
     # For now, let's just make sure we can import
     import sys
     sys.path.append(BASE_DIR)
-    build_site()
+
+    parser = argparse.ArgumentParser(description="Build the personal website.")
+    parser.add_argument("--force", action="store_true", help="Render even if no input changed since the last build")
+    stages = parser.add_mutually_exclusive_group()
+    stages.add_argument("--render-only", action="store_true", help="Render from cached data without any network access")
+    stages.add_argument("--fetch-only", action="store_true", help="Refresh cached data without rendering")
+    parser.add_argument("--source", action="append", choices=sorted(SOURCES),
+                        help="Fetch only this source (repeatable); others come from cache")
+    parser.add_argument("--inline", type=int, default=None,
+                        help="Newest works rendered into index.html; older ones go to per-year shards (0 = all inline)")
+    parser.add_argument("--trace", default=None, help="Where to write the build trace (default .cache/trace/build.json)")
+    parser.add_argument("--trace-format", choices=["json", "chrome"], default="json",
+                        help="Trace format; 'chrome' loads in chrome://tracing or Perfetto")
+    parser.add_argument("--trace-history", action="store_true",
+                        help=f"Append a stage summary to {os.path.relpath(trace.HISTORY_FILE, BASE_DIR)}")
+    args = parser.parse_args()
+    build_site(force=args.force, fetch=not args.render_only, render=not args.fetch_only, only=args.source, inline=args.inline)
+
+    print("Trace:")
+    trace.print_summary()
+    path = trace.write("build", args.trace, chrome=args.trace_format == "chrome",
+                       history=trace.HISTORY_FILE if args.trace_history else None)
+    print(f"Trace written to {os.path.relpath(path, BASE_DIR)}")
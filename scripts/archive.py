@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import os
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+# Archive of raw PubmedArticle XML as fetched from efetch, so extraction
+# rules can be changed and re-applied to every cached paper without going
+# back to NCBI. Each article is stored gzipped under the SHA-256 of its XML
+# (objects/ab/abcdef....xml.gz); index.tsv maps PMIDs to digests, one
+# appended line per new version (the last line for a PMID wins).
+
+ARCHIVE_DIR = os.path.join(parent_dir, '.cache', 'pubmed_archive')
+REPROCESS_WORKERS = os.cpu_count() or 2
+REPROCESS_BATCH = 500
+
+_lock = threading.Lock()
+_index = None
+_index_dir = None
+
+def _paths():
+    # Resolved at call time so tools can point the module at another directory
+    return os.path.join(ARCHIVE_DIR, 'objects'), os.path.join(ARCHIVE_DIR, 'index.tsv')
+
+def _object_path(digest):
+    objects, _ = _paths()
+    return os.path.join(objects, digest[:2], digest + '.xml.gz')
+
+def load_index():
+    """PMID -> digest of its latest archived version."""
+    global _index, _index_dir
+    if _index is None or _index_dir != ARCHIVE_DIR:
+        index = {}
+        _, index_path = _paths()
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    pmid, _, digest = line.rstrip('\n').partition('\t')
+                    if digest:
+                        index[pmid] = digest
+        _index, _index_dir = index, ARCHIVE_DIR
+    return _index
+
+def put(pmid, xml):
+    """Archive one article's raw XML bytes; returns its digest. Thread-safe."""
+    digest = hashlib.sha256(xml).hexdigest()
+    path = _object_path(digest)
+    with _lock:
+        index = load_index()
+        if index.get(pmid) == digest and os.path.exists(path):
+            return digest
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                # mtime=0: identical XML always produces identical bytes
+                f.write(gzip.compress(xml, mtime=0))
+            os.replace(tmp, path)
+        _, index_path = _paths()
+        with open(index_path, 'a', encoding='utf-8') as f:
+            f.write(f"{pmid}\t{digest}\n")
+        index[pmid] = digest
+    return digest
+
+def put_element(article):
+    """Archive a parsed ``PubmedArticle`` element."""
+    pmid = article.findtext("MedlineCitation/PMID")
+    if pmid:
+        put(pmid, ET.tostring(article, encoding='utf-8'))
+
+def get(pmid):
+    """Raw XML bytes of the latest archived version of ``pmid``, or None."""
+    digest = load_index().get(pmid)
+    if not digest:
+        return None
+    try:
+        with open(_object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read())
+    except OSError:
+        return None
+
+def _parse_batch(archive_dir, pmids):
+    """Worker: re-run parse_article on archived XML (runs in a child process)."""
+    global ARCHIVE_DIR
+    from scripts.fetch_pubmed import parse_article
+
+    ARCHIVE_DIR = archive_dir
+    works = {}
+    for pmid in pmids:
+        xml = get(pmid)
+        if xml is not None:
+            works[pmid] = parse_article(ET.fromstring(xml))
+    return works
+
+def reprocess(store, workers=REPROCESS_WORKERS, batch_size=REPROCESS_BATCH):
+    """Re-derive every archived record in ``store`` from its raw XML.
+
+    Parsing runs in a process pool; results are merged like a PubMed refresh,
+    so ``theme`` and fields listed in a record's ``overrides`` are kept.
+    Returns (records reprocessed, records changed, keys with no archived XML).
+    """
+    from scripts.fetch_pubmed import merge_refreshed
+
+    index = load_index()
+    keys = store.keys()
+    archived = [key for key in keys if key in index]
+    missing = [key for key in keys if key not in index]
+    batches = [archived[i:i + batch_size] for i in range(0, len(archived), batch_size)]
+
+    changed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for works in pool.map(_parse_batch, [ARCHIVE_DIR] * len(batches), batches):
+            changed += store.upsert_many((key, merge_refreshed(store.get(key), work)) for key, work in works.items())
+    store.save()
+    return len(archived), changed, missing
+
+def main():
+    from scripts.store import PublicationStore
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "reprocess":
+        start = time.perf_counter()
+        with PublicationStore() as store:
+            done, changed, missing = reprocess(store)
+        print(f"Reprocessed {done} record(s) from the archive in {time.perf_counter() - start:.2f}s; {changed} changed.")
+        if missing:
+            print(f"{len(missing)} cached record(s) have no archived XML (fetched before archiving, or not from PubMed).")
+    elif command == "backfill":
+        # One-time fetch of records cached before the archive existed
+        from scripts.fetch_pubmed import fetch_details
+        with PublicationStore() as store:
+            index = load_index()
+            missing = [key for key in store.keys() if key not in index and key.isdigit()]
+            print(f"Fetching raw XML for {len(missing)} unarchived record(s)...")
+            fetch_details(missing)
+            print(f"{len([key for key in missing if key in load_index()])} record(s) archived; run 'reprocess' to apply.")
+    elif command == "stats":
+        index = load_index()
+        objects, _ = _paths()
+        size = sum(os.path.getsize(os.path.join(d, n)) for d, _, names in os.walk(objects) for n in names) if os.path.isdir(objects) else 0
+        print(f"{len(index)} PMIDs archived, {size / 1e6:.1f} MB compressed, in {ARCHIVE_DIR}")
+    else:
+        print("Usage: python scripts/archive.py [reprocess|backfill|stats]")
+
+if __name__ == "__main__":
+    main()
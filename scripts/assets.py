@@ -0,0 +1,173 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # optional: .br siblings are skipped without it
+    brotli = None
+
+# Asset stage run on the rendered page: minify the HTML (with its inline
+# scripts) and the static files it references, publish those under
+# content-hashed names so they can be cached forever, rewrite the page's
+# references to them, and write .gz/.br siblings next to each output.
+# Dependency-free and deliberately conservative: whitespace and comments
+# only, never renaming anything.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Static files referenced from the page, relative to the site root
+FINGERPRINTED = ["static/css/style.css", "static/js/search.js"]
+REPORT_FILE = os.path.join(BASE_DIR, 'data', 'asset_report.json')
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Above this size brotli 11 costs ~10x the time of 9 for a few percent
+BROTLI_FAST_QUALITY = 9
+BROTLI_FAST_ABOVE = 32 * 1024
+
+# Tags whose surrounding whitespace never renders
+BLOCK_TAGS = ("html|head|body|meta|link|title|script|style|header|footer|main|section|article|nav|"
+              "div|p|ul|ol|li|h[1-6]|picture|source|br|hr|table|thead|tbody|tr|td|th")
+_PROTECTED = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2>)", re.S | re.I)
+_BLOCK_SPACE = re.compile(rf"\s*(</?(?:{BLOCK_TAGS})\b[^>]*>)\s*", re.I)
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # A space before ':' in a selector is a descendant combinator (".a :hover"),
+    # so it is only dropped in declarations, the text that ends with '}'
+    parts = re.split(r"([{}])", css)
+    for i in range(0, len(parts), 2):
+        closes_block = i + 1 < len(parts) and parts[i + 1] == "}"
+        parts[i] = re.sub(r"\s*:\s*" if closes_block else r":\s+", ":", parts[i])
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", "".join(parts))
+    css = css.replace(";}", "}")
+    return css.strip()
+
+def minify_js(js):
+    """Strip indentation, blank lines and whole-line // comments; keeps newlines for ASI."""
+    lines = (line.strip() for line in js.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+def minify_json(text):
+    try:
+        return json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
+    except ValueError:
+        return text.strip()
+
+def _minify_protected(match):
+    open_tag, tag, body, close_tag = match.groups()
+    tag = tag.lower()
+    if tag == "script":
+        body = minify_json(body) if "json" in open_tag.lower() else minify_js(body)
+    elif tag == "style":
+        body = minify_css(body)
+    return open_tag + body + close_tag
+
+def minify_html(html):
+    """Collapse whitespace between elements; <pre>/<textarea> are left verbatim."""
+    out, pos, after_block = [], 0, False
+    for match in _PROTECTED.finditer(html):
+        # <script>/<style> are block-level: drop the whitespace around them too
+        block = match.group(2).lower() in ("script", "style")
+        text = _collapse(html[pos:match.start()])
+        text = text.lstrip() if after_block else text
+        out.append(text.rstrip() if block else text)
+        out.append(_minify_protected(match))
+        pos, after_block = match.end(), block
+    text = _collapse(html[pos:])
+    out.append(text.lstrip() if after_block else text)
+    return "".join(out).strip()
+
+def _collapse(text):
+    text = re.sub(r"\s+", " ", text)
+    return _BLOCK_SPACE.sub(r"\1", text)
+
+def fingerprint(path, data):
+    """``dir/name.<hash>.ext`` for the given content."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+def write_if_changed(path, data):
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def precompress(path, data):
+    """Write .gz (and .br when brotli is installed) siblings; returns their sizes."""
+    sizes = {}
+    # mtime=0 keeps the .gz byte-identical across builds of the same content
+    gz = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    write_if_changed(path + ".gz", gz)
+    sizes["gzip"] = len(gz)
+    if brotli is not None:
+        quality = BROTLI_QUALITY if len(data) <= BROTLI_FAST_ABOVE else BROTLI_FAST_QUALITY
+        br = brotli.compress(data, quality=quality)
+        write_if_changed(path + ".br", br)
+        sizes["brotli"] = len(br)
+    return sizes
+
+MINIFIERS = {".css": minify_css, ".js": minify_js, ".json": minify_json}
+
+def publish_static(root, rel_path, original=None, source_root=None):
+    """Minify one static file into its fingerprinted copy; returns (new rel path, report row).
+
+    ``original`` is the content of a generated file that has no source on
+    disk; otherwise the source is read from ``source_root`` (default ``root``).
+    """
+    if original is None:
+        with open(os.path.join(source_root or root, rel_path), 'r', encoding='utf-8') as f:
+            original = f.read()
+    data = MINIFIERS[os.path.splitext(rel_path)[1]](original).encode('utf-8')
+    rel_output = fingerprint(rel_path, data)
+    output = os.path.join(root, rel_output)
+
+    # Drop earlier fingerprints of the same file
+    stem, ext = os.path.splitext(os.path.join(root, rel_path))
+    for old in glob.glob(f"{glob.escape(stem)}.*{ext}*"):
+        if not os.path.basename(old).startswith(os.path.basename(output)):
+            os.remove(old)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    write_if_changed(output, data)
+    row = {"original": len(original.encode('utf-8')), "minified": len(data)}
+    row.update(precompress(output, data))
+    return rel_output, row
+
+def publish(html, output_path, generated=None, root=BASE_DIR, source_root=None):
+    """Run the asset stage on rendered ``html`` and write it to ``output_path``.
+
+    ``generated`` maps site-relative paths referenced by the page to file
+    contents produced by the build. Static sources are read from
+    ``source_root`` (default ``root``, the site being written). Returns the
+    per-asset byte report, also saved to REPORT_FILE.
+    """
+    report = {}
+    files = [(rel_path, None) for rel_path in FINGERPRINTED] + list((generated or {}).items())
+    for rel_path, content in files:
+        rel_output, row = publish_static(root, rel_path, content, source_root)
+        html = re.sub(rf'(["\']){re.escape(rel_path)}\1', rf'\g<1>{rel_output}\g<1>', html)
+        report[rel_output] = row
+
+    data = minify_html(html).encode('utf-8')
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    row = {"original": len(html.encode('utf-8')), "minified": len(data)}
+    row.update(precompress(output_path, data))
+    report[os.path.relpath(output_path, root)] = row
+
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    return report
+
+def print_report(report):
+    for name, row in report.items():
+        saved = 1 - row["minified"] / row["original"] if row["original"] else 0
+        compressed = "  ".join(f"{kind} {row[kind]:>7,} B" for kind in ("gzip", "brotli") if kind in row)
+        print(f"  {name:<34} {row['original']:>7,} B -> {row['minified']:>7,} B ({saved:.0%} smaller)  {compressed}")
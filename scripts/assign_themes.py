@@ -1,93 +1,283 @@
+import argparse
+import hashlib
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import openai
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scripts import scheduler, trace
+from scripts.store import PublicationStore
+from scripts.themes import THEMES, match_rules, normalize_title
+
 # Load .env file
 load_dotenv()
 
-CACHE_FILE = os.path.join(os.path.dirname(__file__), '../data/publications_cache.json')
 API_KEY = os.getenv("OPENAI_API_KEY")
+MODEL = "gpt-5-nano"
 
-if not API_KEY:
-    print("Error: OPENAI_API_KEY not found in .env file.")
-    print("Please create a .env file with your API key: OPENAI_API_KEY=sk-...")
-    exit(1)
+# Titles already classified, keyed by title_key(); survives theme resets
+MEMO_FILE = os.path.join(parent_dir, 'data', 'theme_memo.json')
+BATCH_SIZE = 25
+# Concurrent LLM requests; the request rate itself is capped by
+# scripts/scheduler.py (OPENAI_RPM), which also retries 429s and 5xx.
+MAX_WORKERS = 8
+# OpenAI errors worth retrying; anything else (bad request, auth) fails at once
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
 
-client = OpenAI(api_key=API_KEY)
+RULES = """
+    Rules:
+    - If the paper mentions "curriculum", "students", "teaching", "education", "assignment", or "flipped class", it MUST be "Education & Public Health", even if it uses AI.
+    - If it's about drug metabolism, pharmacokinetics (PK), CYP, or dosage, it's "Pharmacology & Precision Med.".
+    - If it's about brain, depression, autism, or neurons, it's "Neuroscience".
+    - Otherwise, if it mentions AI, LLM, or ChatGPT, it's "Medical AI & Data Science".
+"""
 
-THEMES = [
-    "Medical AI & Data Science",
-    "Pharmacology & Precision Med.",
-    "Neuroscience",
-    "Education & Public Health"
-]
+_client = None
 
-def load_cache():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+def get_client():
+    global _client
+    if _client is None:
+        if not API_KEY:
+            print("Error: OPENAI_API_KEY not found in .env file.")
+            print("Please create a .env file with your API key: OPENAI_API_KEY=sk-...")
+            sys.exit(1)
+        # Retries are left to the scheduler so they share the host's rate limit
+        _client = OpenAI(api_key=API_KEY, max_retries=0)
+    return _client
+
+def create_completion(**kwargs):
+    """chat.completions.create() under the shared OpenAI rate limit."""
+    client = get_client()
+    return scheduler.call(scheduler.OPENAI_HOST, lambda: client.chat.completions.create(**kwargs),
+                          retry_on=RETRYABLE_ERRORS)
+
+def title_key(title):
+    """Memo key: changes if either the title or the THEMES list changes."""
+    raw = normalize_title(title) + "\n" + "|".join(THEMES)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def load_memo():
+    if os.path.exists(MEMO_FILE):
+        with open(MEMO_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
     return {}
 
-def save_cache(cache):
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+def save_memo(memo):
+    os.makedirs(os.path.dirname(MEMO_FILE), exist_ok=True)
+    with open(MEMO_FILE, 'w', encoding='utf-8') as f:
+        json.dump(memo, f, ensure_ascii=False, indent=2, sort_keys=True)
 
 def categorize_title(title):
+    """Theme for one title, or None if the call failed or the answer is not a theme.
+
+    None is never memoized or stored, so the title is retried next run.
+    """
     prompt = f"""
     Classify the following medical research paper title into exactly one of these categories:
     {', '.join(THEMES)}
-
-    Rules:
-    - If the paper mentions "curriculum", "students", "teaching", "education", "assignment", or "flipped class", it MUST be "Education & Public Health", even if it uses AI.
-    - If it's about drug metabolism, pharmacokinetics (PK), CYP, or dosage, it's "Pharmacology & Precision Med.".
-    - If it's about brain, depression, autism, or neurons, it's "Neuroscience".
-    - Otherwise, if it mentions AI, LLM, or ChatGPT, it's "Medical AI & Data Science".
-
+    {RULES}
     Title: "{title}"
-    
+
     Return ONLY the category name.
     """
-    
+
     try:
-        completion = client.chat.completions.create(
-            model="gpt-5-nano", # or gpt-5-nano if available to user
+        completion = create_completion(
+            model=MODEL,
             messages=[
                 {"role": "system", "content": "You are a skillful medical librarian."},
                 {"role": "user", "content": prompt}
             ]
         )
         category = completion.choices[0].message.content.strip()
-        
+
         # Validation
         if category not in THEMES:
-            print(f"Warning: LLM returned unknown category '{category}'. Defaulting to 'Medical AI & Data Science'")
-            return "Medical AI & Data Science"
-            
+            print(f"Warning: LLM returned unknown category '{category}'; will retry next run.")
+            return None
+
         return category
     except Exception as e:
         print(f"Error calling LLM: {e}")
-        return "Medical AI & Data Science"
+        return None
+
+def batch_schema():
+    return {
+        "name": "theme_assignments",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "theme": {"type": "string", "enum": THEMES}
+                        },
+                        "required": ["id", "theme"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False
+        }
+    }
+
+def categorize_titles(titles):
+    """Classify many titles in one structured-output request.
+
+    Returns a list of themes aligned with ``titles``. Titles the model skips
+    are classified one at a time with categorize_title(); those that still
+    fail are None.
+    """
+    trace.count("themes.llm_titles", len(titles))
+    numbered = "\n".join(f"{i}. {title}" for i, title in enumerate(titles))
+    prompt = f"""
+    Classify each of the following medical research paper titles into exactly one of these categories:
+    {', '.join(THEMES)}
+    {RULES}
+    Titles:
+    {numbered}
+
+    Return one result per title, using the number before the title as its id.
+    """
+    with trace.span("themes.llm_batch", titles=len(titles)):
+        completion = create_completion(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": "You are a skillful medical librarian."},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_schema", "json_schema": batch_schema()}
+        )
+    results = json.loads(completion.choices[0].message.content)["results"]
+    by_id = {r["id"]: r["theme"] for r in results if r.get("theme") in THEMES}
+    return [by_id.get(i) or categorize_title(title) for i, title in enumerate(titles)]
+
+def untagged_works(store):
+    """(key, work) pairs with no theme, looked up via the theme index."""
+    rows = store.conn.execute("SELECT key FROM works WHERE theme IS NULL OR theme = '' ORDER BY rowid")
+    return [(key, store.get(key)) for (key,) in rows.fetchall()]
+
+def classify_locally(store, pending, threshold=None):
+    """Assign confident offline predictions and drop them from ``pending``."""
+    try:
+        from scripts import classify_themes
+    except ImportError as e:
+        print(f"Offline classifier unavailable ({e}); using the LLM for every title.")
+        return 0
+
+    threshold = classify_themes.CONFIDENCE_THRESHOLD if threshold is None else threshold
+    clf = classify_themes.train_from_store(store)
+    memo_keys = list(pending)
+    titles = [pending[k][0][1]['title'] for k in memo_keys]
+    if clf is None:
+        # Nothing to train on yet: only the keyword rules can be applied
+        predictions = [(match_rules(t), 1.0) for t in titles]
+    else:
+        themes, confidences, _ = clf.classify(titles)
+        predictions = list(zip(themes, confidences))
+
+    count = 0
+    for memo_key, (theme, confidence) in zip(memo_keys, predictions):
+        if theme and confidence >= threshold:
+            for key, data in pending.pop(memo_key):
+                data["theme"] = theme
+                store.upsert(key, data)
+                count += 1
+    return count
 
 def main():
-    cache = load_cache()
-    updated_count = 0
-    
+    parser = argparse.ArgumentParser(description="Assign themes to cached papers that have none.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Titles per LLM request")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Concurrent LLM requests")
+    parser.add_argument("--no-local", action="store_true", help="Skip the offline classifier and send every title to the LLM")
+    parser.add_argument("--threshold", type=float, default=None, help="Minimum local classifier confidence (default: classify_themes.CONFIDENCE_THRESHOLD)")
+    args = parser.parse_args()
+
+    store = PublicationStore()
+    memo = load_memo()
+    updated_count = failed_count = 0
+
     print("Checking for papers without themes...")
-    
-    for pmid, data in cache.items():
-        if "theme" not in data or not data["theme"]:
-            print(f"Categorizing: {data['title'][:50]}...")
-            theme = categorize_title(data['title'])
-            data["theme"] = theme
-            print(f" -> Assigned: {theme}")
+    pending = {}  # title_key -> [(key, work), ...]
+    for key, data in untagged_works(store):
+        memo_key = title_key(data['title'])
+        if memo_key in memo:
+            data["theme"] = memo[memo_key]
+            store.upsert(key, data)
             updated_count += 1
-            
+        else:
+            pending.setdefault(memo_key, []).append((key, data))
+
+    trace.count("themes.memo_hits", updated_count)
+    if updated_count:
+        print(f"Reused {updated_count} memoized themes.")
+        store.save()
+
+    if pending and not args.no_local:
+        with trace.span("themes.local"):
+            local_count = classify_locally(store, pending, args.threshold)
+        trace.count("themes.local", local_count)
+        if local_count:
+            print(f"Classified {local_count} papers offline.")
+            updated_count += local_count
+            store.save()
+
+    if pending:
+        memo_keys = list(pending)
+        batches = [memo_keys[i:i + args.batch_size] for i in range(0, len(memo_keys), args.batch_size)]
+        print(f"Categorizing {len(memo_keys)} titles in {len(batches)} batch(es)...")
+
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = {
+                pool.submit(categorize_titles, [pending[k][0][1]['title'] for k in batch]): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    themes = future.result()
+                except Exception as e:
+                    print(f"Error calling LLM for a batch of {len(batch)}: {e}")
+                    failed_count += len(batch)
+                    continue
+
+                # Checkpoint each finished batch so an interrupted run resumes here
+                for memo_key, theme in zip(batch, themes):
+                    if theme is None:
+                        # Left untagged and out of the memo, so the next run retries it
+                        failed_count += 1
+                        continue
+                    memo[memo_key] = theme
+                    for key, data in pending[memo_key]:
+                        data["theme"] = theme
+                        store.upsert(key, data)
+                        print(f" -> {data['title'][:50]}...: {theme}")
+                        updated_count += 1
+                save_memo(memo)
+                store.save()
+
     if updated_count > 0:
-        save_cache(cache)
         print(f"Updated {updated_count} papers.")
-    else:
+    elif not failed_count:
         print("All papers already have themes.")
+    if failed_count:
+        print(f"{failed_count} title(s) could not be classified; they will be retried next run.")
+    scheduler.print_stats()
+    trace.write("assign_themes")
+    store.close()
 
 if __name__ == "__main__":
     main()
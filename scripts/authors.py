@@ -0,0 +1,103 @@
+import re
+
+# Structured author lists. Works store ``authors`` as compact rows
+# ``[last, initials, position, is_target]`` (position is 1-based; initials
+# are "" for collective names) plus ``author_count``. The full list is
+# stored, so a profile added later can still find itself in old works.
+# Consortium lists are cut only on the way out: the page shows
+# DISPLAY_LIMIT names plus target authors, and the search index takes the
+# first SEARCH_LIMIT, the last author and target authors (compact()).
+# ``is_target`` records a match against any of TARGETS when the row was
+# made; highlighting and compact() re-check the names against TARGETS as
+# set for the site being rendered (a multi-profile build sets one target
+# per site).
+
+TARGET_LAST = "Ahn"
+TARGET_INITIAL = "S"
+# (last name, initial prefix) pairs
+TARGETS = [(TARGET_LAST, TARGET_INITIAL)]
+SEARCH_LIMIT = 30
+DISPLAY_LIMIT = 10
+
+# "Cho HJ" style entries of the old pre-rendered strings
+_LEGACY_NAME = re.compile(r"^(.+) ([A-Z]{1,4})$")
+_UNDERLINE = re.compile(r"^<u>(.*)</u>$")
+
+def is_target(last, initials):
+    return any(last.lower() == target_last.lower() and initials.startswith(target_initial)
+               for target_last, target_initial in TARGETS)
+
+def make_author(last, initials, position):
+    return [last, initials, position, is_target(last, initials)]
+
+def compact(authors):
+    """The first SEARCH_LIMIT rows, the last author and every target author."""
+    if len(authors) <= SEARCH_LIMIT + 1:
+        return authors
+    return [a for i, a in enumerate(authors)
+            if i < SEARCH_LIMIT or i == len(authors) - 1 or is_target(a[0], a[1])]
+
+def author_fields(authors):
+    """``authors`` / ``author_count`` fields for a full list of rows."""
+    return {"authors": authors, "author_count": len(authors)}
+
+def parse_legacy(text):
+    """Rows from an old pre-rendered string such as "<u>Ahn S</u>, Cho HJ"."""
+    authors = []
+    for position, entry in enumerate((e.strip() for e in text.split(", ") if e.strip()), start=1):
+        underlined = _UNDERLINE.match(entry)
+        name = underlined.group(1) if underlined else entry
+        match = _LEGACY_NAME.match(name)
+        last, initials = (match.group(1), match.group(2)) if match else (name, "")
+        authors.append([last, initials, position, bool(underlined) or is_target(last, initials)])
+    return authors
+
+def migrate_work(work):
+    """Return ``work`` with string authors converted to rows (unchanged if already migrated)."""
+    if not isinstance(work.get("authors"), str):
+        return work
+    migrated = {}
+    for field, value in work.items():
+        if field == "authors":
+            migrated.update(author_fields(parse_legacy(value)))
+        elif field != "author_count":
+            migrated[field] = value
+    return migrated
+
+def author_text(authors):
+    """Plain-text author names, for search (capped by compact())."""
+    if isinstance(authors, str):
+        return authors
+    return " ".join(f"{last} {initials}" for last, initials, _, _ in compact(authors or []))
+
+def render_authors(work, limit=None):
+    """Author line HTML: target authors underlined, truncated with "et al.".
+
+    The first ``limit`` (DISPLAY_LIMIT) authors are listed, followed by any
+    target author past the limit. Legacy pre-rendered strings pass through.
+    """
+    from markupsafe import Markup, escape
+
+    authors = work.get("authors") or []
+    if isinstance(authors, str):
+        return Markup(authors)
+    limit = DISPLAY_LIMIT if limit is None else limit
+    count = work.get("author_count", len(authors))
+
+    def name(author):
+        last, initials = author[0], author[1]
+        text = escape(f"{last} {initials}".strip())
+        return Markup(f"<u>{text}</u>") if is_target(last, initials) else text
+
+    shown = [name(a) for a in authors[:limit]]
+    previous = authors[len(shown) - 1][2] if shown else 0
+    for author in authors[limit:]:
+        if is_target(author[0], author[1]):
+            # Mark the gap when the target is not directly after the last one shown
+            shown.append(Markup("…") if author[2] > previous + 1 else None)
+            shown.append(name(author))
+            previous = author[2]
+    line = Markup(", ").join(part for part in shown if part is not None)
+    if count > previous:
+        line = line + Markup(", et al.") if line else Markup("et al.")
+    return line
@@ -0,0 +1,217 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import build
+from scripts import archive, http_client, fetch_pubmed, shards, store as store_module
+from scripts.bench_parse_pubmed import legacy_parse
+from scripts.eutils_stub import start_stub, synthetic_article
+from scripts.fetch_pubmed import iter_search_ids, iter_articles, fetch_details_with_cache, post_ids, SEARCH_TERM
+from scripts.search_index import build_index, encode_index
+from scripts.store import PublicationStore, _dump_export
+from scripts.themes import THEMES
+
+# End-to-end benchmark of the build pipeline against local data only:
+#   * synthetic bibliographies served by scripts/eutils_stub.py, timing each
+#     stage (search, detail fetch, parse, cache write, render) separately;
+#   * optionally, a replay of real responses recorded once with --record.
+# Results are written as JSON so runs can be compared over time.
+
+DEFAULT_SIZES = [10, 1000, 100000]
+DEFAULT_AUTHORS = 2000
+RESULTS_FILE = os.path.join(parent_dir, '.cache', 'bench', 'build_bench.json')
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def __call__(self, name):
+        timer = self
+
+        class _Span:
+            def __enter__(self):
+                self.start = time.perf_counter()
+
+            def __exit__(self, *exc):
+                timer.stages[name] = round(time.perf_counter() - self.start, 4)
+
+        return _Span()
+
+def download_chunks(ids):
+    """efetch every ID through the history server, keeping raw bodies (no parsing)."""
+    webenv, query_key = post_ids(ids)
+    url = f"{fetch_pubmed.EUTILS_BASE}/efetch.fcgi"
+    chunk = fetch_pubmed.EFETCH_CHUNK_SIZE
+
+    def fetch(start):
+        resp = http_client.post(url, data={"db": "pubmed", "query_key": query_key, "WebEnv": webenv,
+                                           "retstart": start, "retmax": chunk, "retmode": "xml"})
+        resp.raise_for_status()
+        return resp.content
+
+    with ThreadPoolExecutor(max_workers=fetch_pubmed.EFETCH_WORKERS) as pool:
+        return list(pool.map(fetch, range(0, len(ids), chunk)))
+
+def render(publications, previous=None):
+    """Render index.html as build_site does: newest works inline, older ones as year shards.
+
+    Returns (html, shard file map, number of shards rendered); pass the map
+    back as ``previous`` to only re-render changed shards.
+    """
+    inline, year_shards = shards.split_publications(publications)
+    files, rendered = shards.write_shards(year_shards, build.render_shard, "bench", previous)
+    html = build.render_page({
+        "publications": inline,
+        "shards": year_shards,
+        "themes": THEMES,
+        "search_index": build.SEARCH_INDEX,
+        "videos": [],
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "author": build.AUTHOR
+    })
+    return html, files, rendered
+
+def bench_synthetic(size, latency=0.0):
+    server, base_url = start_stub(size, latency=latency)
+    fetch_pubmed.EUTILS_BASE = base_url
+    timer = StageTimer()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            with timer("search"):
+                ids = list(iter_search_ids(SEARCH_TERM))
+            assert len(ids) == size, f"search returned {len(ids)} of {size} records"
+
+            with timer("detail_fetch"):
+                bodies = download_chunks(ids)
+
+            with timer("parse"):
+                works = [work for body in bodies for work in iter_articles(io.BytesIO(body))]
+
+            with timer("cache_write"):
+                store = PublicationStore(os.path.join(tmp, 'bench.db'), os.path.join(tmp, 'bench.json'))
+                store.upsert_many((work['pmid'], work) for work in works)
+                store.save()
+
+            all_works = store.all_works()
+            with timer("render"):
+                html, files, _ = render(all_works)
+            # A new paper arrives: only the shard it pushes a work into changes
+            newest = dict(all_works[0], pmid="new", title="A newly published synthetic study")
+            with timer("render_incremental"):
+                _, _, rerendered = render([newest] + all_works, files)
+            store.close()
+
+            # The real pipeline: streamed search -> chunked fetch + parse -> store
+            with timer("end_to_end_fetch"):
+                with PublicationStore(os.path.join(tmp, 'e2e.db'), os.path.join(tmp, 'e2e.json')) as e2e:
+                    fetch_details_with_cache(iter_search_ids(SEARCH_TERM), e2e)
+
+            calls = dict(server.RequestHandlerClass.bibliography.calls)
+    finally:
+        server.shutdown()
+    return {"records": size, "stages": timer.stages, "html_bytes": len(html.encode('utf-8')),
+            "shards": len(files), "shards_rerendered": rerendered, "stub_calls": calls}
+
+def use_temp_data(tmp):
+    """Point every on-disk cache at ``tmp`` so a bench run never touches data/."""
+    store_module.DB_FILE = os.path.join(tmp, 'publications.db')
+    store_module.CACHE_FILE = os.path.join(tmp, 'publications_cache.json')
+    fetch_pubmed.SYNC_FILE = os.path.join(tmp, 'sync_state.json')
+    http_client.CACHE_DIR = os.path.join(tmp, 'http')
+    shards.SHARD_DIR = os.path.join(tmp, 'pubs')
+    archive.ARCHIVE_DIR = os.path.join(tmp, 'pubmed_archive')
+
+def bench_fixtures(mode, fixtures_dir):
+    """Run fetch_works() while recording real responses to, or replaying them from, ``fixtures_dir``."""
+    http_client.FIXTURES_MODE = mode
+    http_client.FIXTURES_DIR = fixtures_dir
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_data(tmp)
+        with timer("fetch_works"):
+            works = fetch_pubmed.fetch_works()
+        with timer("render"):
+            render(works)
+    return {"mode": mode, "records": len(works), "stages": timer.stages}
+
+def record_weight(work):
+    """Bytes one record costs in the JSON cache, the rendered page and the search index."""
+    cache = io.StringIO()
+    _dump_export({work["pmid"]: work}, cache)
+    item = build.get_environment().from_string(
+        "{% from 'pub_item.html' import pub_item %}{{ pub_item(pub, 0) }}").render(pub=work)
+    return {
+        "cache_bytes": len(cache.getvalue().encode('utf-8')),
+        "page_bytes": len(item.encode('utf-8')),
+        "index_bytes": len(encode_index(build_index([work])))
+    }
+
+def bench_authors(count):
+    """One synthetic consortium paper: pre-rendered author string vs structured, capped rows."""
+    xml = f"<PubmedArticleSet>{synthetic_article(0, count)}</PubmedArticleSet>".encode('utf-8')
+    before = legacy_parse(xml)[0]
+    after = next(iter_articles(io.BytesIO(xml)))
+    return {"authors": count, "before": record_weight(before), "after": record_weight(after)}
+
+def print_result(label, result):
+    stages = "  ".join(f"{name}={seconds:.3f}s" for name, seconds in result["stages"].items())
+    print(f"{label:>12}: {stages}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the build pipeline without live network access.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="Synthetic bibliography sizes")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated per-request latency of the stub (s)")
+    parser.add_argument("--record", action="store_true", help="Record live PubMed responses as fixtures first")
+    parser.add_argument("--replay", action="store_true", help="Also replay the recorded fixtures")
+    parser.add_argument("--fixtures", default=http_client.FIXTURES_DIR, help="Fixture directory")
+    parser.add_argument("--authors", type=int, default=DEFAULT_AUTHORS, help="Author count of the synthetic consortium record (0 to skip)")
+    parser.add_argument("--output", default=RESULTS_FILE, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "synthetic": [],
+        "fixtures": []
+    }
+
+    if args.authors:
+        results["authors"] = bench_authors(args.authors)
+        for label in ("before", "after"):
+            weight = results["authors"][label]
+            print(f"{args.authors} authors, {label:>6}: " + "  ".join(f"{k}={v:,}" for k, v in weight.items()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_data(tmp)
+        for size in args.sizes:
+            result = bench_synthetic(size, args.latency)
+            results["synthetic"].append(result)
+            print_result(f"{size} recs", result)
+
+    real_base = fetch_pubmed.EUTILS_BASE = os.getenv("EUTILS_BASE", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+    for mode in (["record"] if args.record else []) + (["replay"] if args.replay else []):
+        fetch_pubmed.EUTILS_BASE = real_base
+        result = bench_fixtures(mode, args.fixtures)
+        results["fixtures"].append(result)
+        print_result(mode, result)
+    http_client.FIXTURES_MODE = ""
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import sys
+import os
+import time
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scripts.authors import migrate_work
+from scripts.eutils_stub import synthetic_article
+from scripts.fetch_pubmed import iter_articles, format_author, map_category
+
+# Synthetic response sizes to compare (records per efetch response)
+SIZES = [10, 1000, 10000]
+AUTHORS_PER_RECORD = 8
+
+def write_synthetic_xml(path, n):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("<?xml version=\"1.0\" ?>\n<PubmedArticleSet>\n")
+        for i in range(n):
+            f.write(synthetic_article(i, AUTHORS_PER_RECORD))
+            f.write("\n")
+        f.write("</PubmedArticleSet>\n")
+
+def legacy_parse(content):
+    """The original fetch_details parser: whole tree in memory, `//` scans per article."""
+    works = []
+    root = ET.fromstring(content)
+    for article in root.findall(".//PubmedArticle"):
+        title = article.findtext(".//ArticleTitle")
+        pub_date = article.find(".//PubDate")
+        year = pub_date.findtext("Year")
+        if not year:
+            medline_date = pub_date.findtext("MedlineDate")
+            if medline_date: year = medline_date[:4]
+        journal = article.findtext(".//Journal/ISOAbbreviation") or article.findtext(".//Journal/Title")
+        pmid = article.findtext(".//PMID")
+        doi = None
+        for id_elem in article.findall(".//ArticleIdList/ArticleId"):
+            if id_elem.get("IdType") == "doi":
+                doi = id_elem.text
+                break
+        url_link = f"https://doi.org/{doi}" if doi else f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+        author_list = []
+        for auth in article.findall(".//AuthorList/Author"):
+            last = auth.findtext("LastName")
+            initials = auth.findtext("Initials")
+            if last and initials:
+                author_list.append(format_author(last, initials))
+            elif auth.findtext("CollectiveName"):
+                author_list.append(auth.findtext("CollectiveName"))
+        types = [t.text for t in article.findall(".//PublicationTypeList/PublicationType")]
+        works.append({
+            "title": title,
+            "year": int(year) if year and year.isdigit() else 0,
+            "journal": journal,
+            "authors": ", ".join(author_list),
+            "url": url_link,
+            "doi": doi,
+            "pmid": pmid,
+            "category": map_category(types)
+        })
+    return works
+
+def run_legacy(path):
+    # The old code read resp.content in full before parsing
+    with open(path, 'rb') as f:
+        content = f.read()
+    count = 0
+    for _ in legacy_parse(content):
+        count += 1
+    return count
+
+def run_streaming(path):
+    # Consume the generator the way a caller merging into the cache would
+    count = 0
+    with open(path, 'rb') as f:
+        for _ in iter_articles(f):
+            count += 1
+    return count
+
+def measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+def main():
+    print(f"{'records':>8} {'size':>9} | {'legacy s':>9} {'legacy peak':>12} | {'stream s':>9} {'stream peak':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            path = os.path.join(tmp, f"efetch_{n}.xml")
+            write_synthetic_xml(path, n)
+            size_mb = os.path.getsize(path) / 1e6
+
+            legacy_count, legacy_time, legacy_peak = measure(run_legacy, path)
+            stream_count, stream_time, stream_peak = measure(run_streaming, path)
+            assert legacy_count == stream_count == n
+
+            print(f"{n:>8} {size_mb:>7.1f}MB | {legacy_time:>9.3f} {legacy_peak / 1e6:>10.1f}MB | "
+                  f"{stream_time:>9.3f} {stream_peak / 1e6:>10.1f}MB")
+
+        # Both parsers must agree field for field (legacy author strings migrated)
+        path = os.path.join(tmp, "efetch_check.xml")
+        write_synthetic_xml(path, 50)
+        with open(path, 'rb') as f:
+            expected = [migrate_work(work) for work in legacy_parse(f.read())]
+        with open(path, 'rb') as f:
+            assert list(iter_articles(f)) == expected
+        print("Streaming output matches legacy parser.")
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-import requests
 import xml.etree.ElementTree as ET
-from scripts.fetch_pubmed import fetch_pubmed_ids
+from scripts import http_client
+from scripts.fetch_pubmed import fetch_pubmed_ids, EUTILS_BASE
 
 SEARCH_TERM = "Ahn Sangzin[Author] OR Sangzin Ahn[Author]"
 
@@ -17,7 +17,7 @@ def check_categories():
     ids = fetch_pubmed_ids(SEARCH_TERM)
     print(f"Found {len(ids)} papers. Checking categories...")
     
-    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    url = f"{EUTILS_BASE}/efetch.fcgi"
     params = {
         "db": "pubmed",
         "id": ",".join(ids),
@@ -27,7 +27,7 @@ def check_categories():
     categories = {}
     
     try:
-        resp = requests.get(url, params=params)
+        resp = http_client.post(url, data=params)
         if resp.status_code == 200:
             root = ET.fromstring(resp.content)
             for article in root.findall(".//PubmedArticle"):
@@ -0,0 +1,193 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scripts.store import PublicationStore
+from scripts.themes import THEMES, match_rules, normalize_title
+
+# Offline theme classifier: the prompt's keyword rules first, then a softmax
+# regression over TF-IDF features trained on the themes already in the store.
+# Titles below CONFIDENCE_THRESHOLD are left for the LLM (assign_themes.py).
+
+CONFIDENCE_THRESHOLD = 0.6
+EPOCHS = 300
+LEARNING_RATE = 2.0
+L2 = 1e-3
+FOLDS = 5
+
+def tokenize(title):
+    words = normalize_title(title).split()
+    # Unigrams plus bigrams so "language model" and "population pharmacokinetic" carry weight
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+class SparseRows:
+    """Minimal sparse (rows x cols) matrix of nonzero (row, col, value) triples.
+
+    Only the two products training and prediction need are supported, so a
+    large bibliography never materializes a dense titles x vocabulary array.
+    """
+
+    def __init__(self, rows, cols, data, shape):
+        self.rows, self.cols, self.data, self.shape = rows, cols, data, shape
+
+    def _sum_by(self, index, length, values):
+        # values: (nnz, k) -> (length, k), summed per index
+        return np.column_stack([np.bincount(index, weights=values[:, c], minlength=length)
+                                for c in range(values.shape[1])])
+
+    def dot(self, dense):
+        """self @ dense"""
+        return self._sum_by(self.rows, self.shape[0], self.data[:, None] * dense[self.cols])
+
+    def tdot(self, dense):
+        """self.T @ dense"""
+        return self._sum_by(self.cols, self.shape[1], self.data[:, None] * dense[self.rows])
+
+class ThemeClassifier:
+    def __init__(self):
+        self.vocab = {}
+        self.idf = None
+        self.weights = None
+        self.bias = None
+
+    def _tf(self, titles):
+        rows, cols = [], []
+        for i, title in enumerate(titles):
+            for token in tokenize(title):
+                j = self.vocab.get(token)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        # Repeated tokens in a title become one entry with their count
+        width = max(len(self.vocab), 1)
+        cells, counts = np.unique(np.array(rows, dtype=np.int64) * width + np.array(cols, dtype=np.int64),
+                                  return_counts=True)
+        return SparseRows(cells // width, cells % width, counts.astype(float), (len(titles), len(self.vocab)))
+
+    def _features(self, titles):
+        """L2-normalized TF-IDF rows, sparse."""
+        x = self._tf(titles)
+        x.data = x.data * self.idf[x.cols]
+        norms = np.sqrt(np.bincount(x.rows, weights=x.data ** 2, minlength=x.shape[0]))
+        x.data = x.data / norms[x.rows]
+        return x
+
+    def fit(self, titles, themes):
+        token_sets = [set(tokenize(t)) for t in titles]
+        self.vocab = {tok: i for i, tok in enumerate(sorted(set().union(*token_sets)))}
+        df = np.zeros(len(self.vocab))
+        for tokens in token_sets:
+            df[[self.vocab[t] for t in tokens]] += 1
+        self.idf = np.log((1 + len(titles)) / (1 + df)) + 1
+
+        x = self._features(titles)
+        y = np.zeros((len(titles), len(THEMES)))
+        y[np.arange(len(titles)), [THEMES.index(t) for t in themes]] = 1.0
+
+        # Full-batch gradient descent on the softmax cross-entropy
+        self.weights = np.zeros((x.shape[1], len(THEMES)))
+        self.bias = np.zeros(len(THEMES))
+        for _ in range(EPOCHS):
+            grad = self._softmax(x.dot(self.weights) + self.bias) - y
+            self.weights -= LEARNING_RATE * (x.tdot(grad) / len(titles) + L2 * self.weights)
+            self.bias -= LEARNING_RATE * grad.mean(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(z):
+        z = z - z.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, titles):
+        return self._softmax(self._features(titles).dot(self.weights) + self.bias)
+
+    def classify(self, titles, use_rules=True):
+        """Classify all titles in one pass; returns (themes, confidences, sources)."""
+        if not titles:
+            return [], [], []
+        proba = self.predict_proba(titles)
+        best = proba.argmax(axis=1)
+        themes = [THEMES[i] for i in best]
+        confidences = proba[np.arange(len(titles)), best].tolist()
+        sources = ["model"] * len(titles)
+        if use_rules:
+            for i, title in enumerate(titles):
+                ruled = match_rules(title)
+                if ruled:
+                    themes[i], confidences[i], sources[i] = ruled, 1.0, "rule"
+        return themes, confidences, sources
+
+def labelled_works(store):
+    return [w for w in store.all_works() if w.get("theme") in THEMES]
+
+def train_from_store(store):
+    works = labelled_works(store)
+    if len({w["theme"] for w in works}) < 2:
+        return None
+    return ThemeClassifier().fit([w["title"] for w in works], [w["theme"] for w in works])
+
+def accuracy_report(works, folds=FOLDS, threshold=CONFIDENCE_THRESHOLD):
+    """Cross-validated accuracy: every labelled title is held out exactly once."""
+    order = np.random.default_rng(0).permutation(len(works))
+    titles = [works[i]["title"] for i in order]
+    truth = [works[i]["theme"] for i in order]
+
+    predicted, confidence, source = [None] * len(titles), [0.0] * len(titles), [None] * len(titles)
+    model_only = [None] * len(titles)
+    for fold in range(folds):
+        test = [i for i in range(len(titles)) if i % folds == fold]
+        train = [i for i in range(len(titles)) if i % folds != fold]
+        clf = ThemeClassifier().fit([titles[i] for i in train], [truth[i] for i in train])
+        themes, confs, srcs = clf.classify([titles[i] for i in test])
+        bare, _, _ = clf.classify([titles[i] for i in test], use_rules=False)
+        for k, i in enumerate(test):
+            predicted[i], confidence[i], source[i], model_only[i] = themes[k], confs[k], srcs[k], bare[k]
+
+    def acc(idx, preds):
+        return sum(preds[i] == truth[i] for i in idx) / len(idx) if idx else float("nan")
+
+    everything = list(range(len(titles)))
+    ruled = [i for i in everything if source[i] == "rule"]
+    confident = [i for i in everything if confidence[i] >= threshold]
+    return {
+        "records": len(titles),
+        "rules+model": acc(everything, predicted),
+        "model only": acc(everything, model_only),
+        "rule coverage": len(ruled) / len(titles),
+        "rule accuracy": acc(ruled, predicted),
+        f"confident (>= {threshold})": len(confident) / len(titles),
+        "confident accuracy": acc(confident, predicted),
+    }
+
+def main():
+    with PublicationStore() as store:
+        works = labelled_works(store)
+        if len(works) < FOLDS:
+            print("Not enough themed papers to evaluate.")
+            return
+
+        print(f"Held-out accuracy ({FOLDS}-fold cross-validation on {len(works)} themed papers):")
+        for name, value in accuracy_report(works).items():
+            print(f"  {name:<24} {value:.3f}" if isinstance(value, float) else f"  {name:<24} {value}")
+
+        start = time.perf_counter()
+        clf = train_from_store(store)
+        trained = time.perf_counter()
+        all_works = store.all_works()
+        themes, confidences, _ = clf.classify([w["title"] for w in all_works])
+        done = time.perf_counter()
+        print(f"Trained in {(trained - start) * 1000:.1f} ms; classified {len(all_works)} papers in {(done - trained) * 1000:.1f} ms.")
+
+        low = [(w, t, c) for w, t, c in zip(all_works, themes, confidences) if c < CONFIDENCE_THRESHOLD]
+        print(f"{len(low)} paper(s) below the {CONFIDENCE_THRESHOLD} confidence threshold would go to the LLM.")
+
+if __name__ == "__main__":
+    main()
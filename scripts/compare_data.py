@@ -1,50 +1,138 @@
-import requests
+import argparse
 import json
+import os
+import sys
+import time
 
-DOI = "10.3343/alm.2025.0422" # "Large Language Model Advances..."
-ORCID_ID = "0000-0003-2749-0014"
-
-def get_orcid_details():
-    url = f"https://pub.orcid.org/v3.0/{ORCID_ID}/works"
-    headers = {"Accept": "application/json"}
-    resp = requests.get(url, headers=headers)
-    if resp.status_code == 200:
-        groups = resp.json().get('group', [])
-        for g in groups:
-            s = g['work-summary'][0]
-            # Check if this is the one
-            for eid in s.get('external-ids', {}).get('external-id', []):
-                if eid['external-id-value'] == DOI:
-                    return s
-    return None
-
-def get_pubmed_details(doi):
-    # 1. Search for PMID
-    search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    params = {"db": "pubmed", "term": doi, "retmode": "json"}
-    resp = requests.get(search_url, params=params)
-    if resp.status_code != 200: return None
-    
-    ids = resp.json().get('esearchresult', {}).get('idlist', [])
-    if not ids: return None
-    pmid = ids[0]
-    
-    # 2. Get Summary
-    # summary_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
-    # params = {"db": "pubmed", "id": pmid, "retmode": "json"}
-    # resp = requests.get(summary_url, params=params)
-    # This gives basic info. efetch gives XML with abstracts.
-    
-    # Let's try efetch for full details including abstract
-    fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-    params = {"db": "pubmed", "id": pmid, "retmode": "xml"}
-    resp = requests.get(fetch_url, params=params)
-    return resp.text # It's XML, but valid for checking presence of abstract/authors
-
-print("--- ORCID Data ---")
-orcid_data = get_orcid_details()
-print(json.dumps(orcid_data, indent=2))
-
-print("\n--- PubMed Data (preview) ---")
-pubmed_xml = get_pubmed_details(DOI)
-print(pubmed_xml[:1000] if pubmed_xml else "No PubMed data")
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scripts import fetch_pubmed, scheduler
+from scripts.fetch_orcid import fetch_summaries, normalize_doi
+from scripts.store import PublicationStore
+from scripts.themes import normalize_title
+
+# Reconciliation of the publication cache against ORCID and PubMed in bulk:
+# one ORCID /works pull, cached DOIs OR-combined into a few esearch queries,
+# and one epost + chunked efetch for every PMID involved. Reports works
+# missing from either source and title/year mismatches, with call counts.
+
+REPORT_FILE = os.path.join(parent_dir, 'data', 'reconciliation_report.json')
+# DOIs per esearch query; keeps the GET URL well under server limits
+DOI_QUERY_SIZE = 100
+
+def search_dois(dois, chunk_size=DOI_QUERY_SIZE):
+    """PMIDs for ``dois``, found with a few OR-combined esearch queries."""
+    pmids = []
+    for i in range(0, len(dois), chunk_size):
+        term = " OR ".join(f'"{doi}"[aid]' for doi in dois[i:i + chunk_size])
+        pmids.extend(fetch_pubmed.iter_search_ids(term, strict=True))
+    return pmids
+
+def year_of(value):
+    return int(value) if value and str(value).isdigit() else 0
+
+def compare(work, other, source):
+    """Mismatch entries between a cached work and the same work in ``source``."""
+    issues = []
+    if other.get("title") and normalize_title(work.get("title")) != normalize_title(other["title"]):
+        issues.append({"field": "title", "source": source, "cache": work.get("title"), "remote": other["title"]})
+    year = year_of(other.get("year"))
+    if year and year != year_of(work.get("year")):
+        issues.append({"field": "year", "source": source, "cache": work.get("year"), "remote": year})
+    return issues
+
+def reconcile(works, orcid, pubmed):
+    """Diff report for cached ``works`` ({key: work}) against ORCID summaries and PubMed works."""
+    orcid_by_id = {}
+    for summary in orcid:
+        for doi in summary["dois"]:
+            orcid_by_id[("doi", doi)] = summary
+        for pmid in summary["pmids"]:
+            orcid_by_id[("pmid", pmid)] = summary
+    pubmed_by_id = {}
+    for work in pubmed:
+        if work.get("doi"):
+            pubmed_by_id[("doi", normalize_doi(work["doi"]))] = work
+        pubmed_by_id[("pmid", work["pmid"])] = work
+
+    def lookup(index, work):
+        for id_key in (("doi", normalize_doi(work.get("doi"))), ("pmid", work.get("pmid"))):
+            if id_key[1] and id_key in index:
+                return index[id_key]
+        return None
+
+    report = {"missing_from_orcid": [], "missing_from_pubmed": [], "missing_from_cache": [], "mismatched": []}
+    seen_orcid = set()
+    for key, work in works.items():
+        entry = {"key": key, "title": work.get("title"), "doi": work.get("doi"), "pmid": work.get("pmid")}
+        summary = lookup(orcid_by_id, work)
+        if summary is None:
+            report["missing_from_orcid"].append(entry)
+        else:
+            seen_orcid.add(summary["put_code"])
+        record = lookup(pubmed_by_id, work)
+        if record is None:
+            # ORCID-only works are expected to be absent from PubMed
+            if work.get("source") != "orcid":
+                report["missing_from_pubmed"].append(entry)
+        issues = (compare(work, summary, "orcid") if summary else []) + (compare(work, record, "pubmed") if record else [])
+        if issues:
+            report["mismatched"].append({**entry, "issues": issues})
+    report["missing_from_cache"] = [
+        {"put_code": s["put_code"], "title": s["title"], "dois": sorted(s["dois"]), "pmids": sorted(s["pmids"])}
+        for s in orcid if s["put_code"] not in seen_orcid]
+    return report
+
+def run_audit():
+    start = time.perf_counter()
+    with PublicationStore() as store:
+        works = store.as_dict()
+    orcid = fetch_summaries()
+
+    dois = sorted({normalize_doi(w["doi"]) for w in works.values() if w.get("doi")})
+    pmids = set(search_dois(dois)) | {w["pmid"] for w in works.values() if w.get("pmid")}
+    pubmed = fetch_pubmed.fetch_details(sorted(pmids)) if pmids else []
+
+    report = reconcile(works, orcid, pubmed)
+    report["summary"] = {
+        "cached": len(works),
+        "orcid": len(orcid),
+        "pubmed": len(pubmed),
+        **{name: len(entries) for name, entries in report.items() if isinstance(entries, list)},
+        "seconds": round(time.perf_counter() - start, 2),
+        "calls": {host: s["requests"] for host, s in scheduler.stats().items()},
+    }
+    return report
+
+def print_audit(report):
+    summary = report["summary"]
+    print(f"Reconciled {summary['cached']} cached works against {summary['orcid']} ORCID and "
+          f"{summary['pubmed']} PubMed records in {summary['seconds']:.2f}s.")
+    for name in ("missing_from_orcid", "missing_from_pubmed", "missing_from_cache"):
+        print(f"\n{name.replace('_', ' ').capitalize()}: {len(report[name])}")
+        for entry in report[name]:
+            print(f"  {entry.get('key') or 'orcid:' + entry['put_code']}  {(entry['title'] or '')[:70]}")
+    print(f"\nMismatched: {len(report['mismatched'])}")
+    for entry in report["mismatched"]:
+        for issue in entry["issues"]:
+            print(f"  {entry['key']}  {issue['field']} ({issue['source']}): {issue['cache']!r} != {issue['remote']!r}")
+    print("\nCalls:")
+    scheduler.print_stats()
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile the publication cache with ORCID and PubMed.")
+    parser.add_argument("--output", default=REPORT_FILE, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = run_audit()
+    print_audit(report)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nReport written to {args.output}")
+
+if __name__ == "__main__":
+    main()
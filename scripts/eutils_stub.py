@@ -0,0 +1,225 @@
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+# Local stand-in for the NCBI E-utilities (esearch, epost, efetch, esummary)
+# serving a deterministic synthetic bibliography, so the fetch pipeline can
+# be benchmarked and exercised without touching PubMed.
+
+FIRST_PMID = 30000000
+FIRST_DATE = date(1990, 1, 1)
+DATE_SPAN_DAYS = 36 * 365
+
+TOPICS = [
+    "large language models for medical education",
+    "population pharmacokinetics of rifampicin",
+    "CYP2C19 polymorphism and clopidogrel response",
+    "depressive-like behavior after transient anosmia",
+    "ChatGPT in clinical decision support",
+    "flipped classroom outcomes in pharmacology teaching",
+    "dendritic spine anomalies in an autism model",
+    "machine learning prediction of warfarin dose",
+]
+JOURNALS = ["Korean J Med Educ", "Clin Pharmacol Ther", "Sci Rep", "Healthc Inform Res", "J Korean Med Sci"]
+# Synthetic DOIs, searchable as "10.9999/synth.N"[aid] terms OR-ed together
+_SYNTH_DOI = re.compile(r'"10\.9999/synth\.(\d+)"\[aid\]', re.IGNORECASE)
+SURNAMES = ["Kim", "Lee", "Park", "Choi", "Jung", "Kang", "Cho", "Yoon", "Jang", "Lim"]
+
+def pub_date(i):
+    return FIRST_DATE + timedelta(days=(i * 7919) % DATE_SPAN_DAYS)
+
+def mod_date(i):
+    return pub_date(i) + timedelta(days=30 + i % 400)
+
+def record_authors(i, count=None):
+    count = count or 3 + i % 8
+    authors = [(SURNAMES[(i + j) % len(SURNAMES)], "ABCDEFGH"[(i * j) % 8] + "J") for j in range(count)]
+    # The site owner appears on every other record at a varying position
+    if i % 2 == 0:
+        authors.insert(i % len(authors), ("Ahn", "S"))
+    return authors
+
+def synthetic_article(i, author_count=None):
+    """PubmedArticle XML for synthetic record ``i``."""
+    published = pub_date(i)
+    authors = "".join(
+        f"<Author ValidYN=\"Y\"><LastName>{last}</LastName><ForeName>{initials}</ForeName><Initials>{initials}</Initials>"
+        f"<AffiliationInfo><Affiliation>Dept. of Pharmacology, Inje University, Busan, Korea.</Affiliation></AffiliationInfo></Author>"
+        for last, initials in record_authors(i, author_count)
+    )
+    review = "<PublicationType UI=\"D016454\">Review</PublicationType>" if i % 5 == 0 else ""
+    return (
+        "<PubmedArticle><MedlineCitation Status=\"MEDLINE\" Owner=\"NLM\">"
+        f"<PMID Version=\"1\">{FIRST_PMID + i}</PMID>"
+        "<Article PubModel=\"Print\"><Journal><JournalIssue CitedMedium=\"Internet\">"
+        f"<Volume>{i % 40}</Volume><PubDate><Year>{published.year}</Year><Month>{published.strftime('%b')}</Month></PubDate>"
+        f"</JournalIssue><Title>{escape(JOURNALS[i % len(JOURNALS)])} (Full Title)</Title>"
+        f"<ISOAbbreviation>{escape(JOURNALS[i % len(JOURNALS)])}</ISOAbbreviation></Journal>"
+        f"<ArticleTitle>Synthetic study {i} on {escape(TOPICS[i % len(TOPICS)])}.</ArticleTitle>"
+        f"<Abstract><AbstractText>{'Lorem ipsum dolor sit amet. ' * 40}</AbstractText></Abstract>"
+        f"<AuthorList CompleteYN=\"Y\">{authors}</AuthorList>"
+        "<PublicationTypeList><PublicationType UI=\"D016428\">Journal Article</PublicationType>"
+        f"{review}</PublicationTypeList>"
+        "</Article></MedlineCitation><PubmedData><ArticleIdList>"
+        f"<ArticleId IdType=\"pubmed\">{FIRST_PMID + i}</ArticleId>"
+        f"<ArticleId IdType=\"doi\">10.9999/synth.{i}</ArticleId>"
+        "</ArticleIdList></PubmedData></PubmedArticle>"
+    )
+
+def _parse_date(value):
+    parts = [int(p) for p in value.split("/")]
+    return date(parts[0], parts[1] if len(parts) > 1 else 1, parts[2] if len(parts) > 2 else 1)
+
+class Bibliography:
+    def __init__(self, size, author_count=None):
+        self.size = size
+        self.author_count = author_count
+        self.histories = {}
+        self._searches = {}
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def index(self, pmid):
+        i = int(pmid) - FIRST_PMID
+        return i if 0 <= i < self.size else None
+
+    def search(self, params):
+        """All matching PMIDs, newest publication first (cached per filter set)."""
+        dois = _SYNTH_DOI.findall(params.get("term", ""))
+        if dois:
+            return [str(FIRST_PMID + int(i)) for i in dois if int(i) < self.size]
+        datetype = params.get("datetype", "pdat")
+        mindate, maxdate = params.get("mindate"), params.get("maxdate")
+        if params.get("reldate"):
+            mindate = (date.today() - timedelta(days=int(params["reldate"]))).strftime("%Y/%m/%d")
+            maxdate = date.today().strftime("%Y/%m/%d")
+        key = (datetype, mindate, maxdate)
+        with self.lock:
+            if key not in self._searches:
+                dated = mod_date if datetype == "mdat" else pub_date
+                lo = _parse_date(mindate) if mindate else date.min
+                hi = _parse_date(maxdate) if maxdate else date.max
+                hits = [i for i in range(self.size) if lo <= dated(i) <= hi]
+                hits.sort(key=pub_date, reverse=True)
+                self._searches[key] = [str(FIRST_PMID + i) for i in hits]
+            return self._searches[key]
+
+class StubHandler(BaseHTTPRequestHandler):
+    bibliography = None
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _params(self):
+        query = parse_qs(urlparse(self.path).query)
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length", 0))
+            query.update(parse_qs(self.rfile.read(length).decode("utf-8")))
+        return {k: v[0] for k, v in query.items()}
+
+    def _send(self, body, content_type, status=200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        if self.latency:
+            time.sleep(self.latency)
+        endpoint = urlparse(self.path).path.rsplit("/", 1)[-1].replace(".fcgi", "")
+        bib = self.bibliography
+        with bib.lock:
+            bib.calls[endpoint] = bib.calls.get(endpoint, 0) + 1
+        handler = getattr(self, f"_{endpoint}", None)
+        if handler is None:
+            self._send("Unknown endpoint", "text/plain", 404)
+            return
+        handler(self._params())
+
+    def _esearch(self, params):
+        hits = self.bibliography.search(params)
+        start, count = int(params.get("retstart", 0)), int(params.get("retmax", 20))
+        result = {"esearchresult": {"count": str(len(hits)), "retstart": str(start), "retmax": str(count),
+                                    "idlist": hits[start:start + count]}}
+        self._send(json.dumps(result), "application/json")
+
+    def _epost(self, params):
+        webenv = uuid.uuid4().hex
+        with self.bibliography.lock:
+            self.bibliography.histories[webenv] = params.get("id", "").split(",")
+        self._send(f"<?xml version=\"1.0\" ?><ePostResult><QueryKey>1</QueryKey><WebEnv>{webenv}</WebEnv></ePostResult>", "text/xml")
+
+    def _requested_ids(self, params):
+        if "WebEnv" in params:
+            ids = self.bibliography.histories.get(params["WebEnv"], [])
+            start = int(params.get("retstart", 0))
+            return ids[start:start + int(params.get("retmax", 20))]
+        return params.get("id", "").split(",")
+
+    def _efetch(self, params):
+        bib = self.bibliography
+        indexes = [bib.index(pid) for pid in self._requested_ids(params)]
+        articles = "\n".join(synthetic_article(i, bib.author_count) for i in indexes if i is not None)
+        self._send("<?xml version=\"1.0\" ?>\n<!DOCTYPE PubmedArticleSet PUBLIC \"-//NLM//DTD PubMedArticle, 1st January 2024//EN\" "
+                   "\"https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_240101.dtd\">\n"
+                   f"<PubmedArticleSet>\n{articles}\n</PubmedArticleSet>", "text/xml")
+
+    def _esummary(self, params):
+        bib = self.bibliography
+        result = {"uids": []}
+        for pid in self._requested_ids(params):
+            i = bib.index(pid)
+            if i is None:
+                continue
+            result["uids"].append(pid)
+            result[pid] = {
+                "uid": pid,
+                "title": f"Synthetic study {i} on {TOPICS[i % len(TOPICS)]}.",
+                "source": JOURNALS[i % len(JOURNALS)],
+                "pubdate": pub_date(i).strftime("%Y %b %d"),
+                "authors": [{"name": f"{last} {initials}"} for last, initials in record_authors(i, bib.author_count)],
+            }
+        self._send(json.dumps({"result": result}), "application/json")
+
+def start_stub(records, port=0, latency=0.0, author_count=None):
+    """Serve a synthetic bibliography in a background thread; returns (server, base_url)."""
+    handler = type("Handler", (StubHandler,), {"bibliography": Bibliography(records, author_count), "latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic PubMed through an E-utilities look-alike.")
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay added to every request")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args.records, args.port, args.latency)
+    print(f"Serving {args.records} synthetic records at {base_url}")
+    print(f"Point the scripts at it with: EUTILS_BASE={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
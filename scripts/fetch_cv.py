@@ -1,14 +1,21 @@
-import requests
-import json
+import os
+import sys
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
 
-ORCID_ID = "0000-0003-2749-0014"
+import json
+from scripts import http_client, scheduler
+from scripts.fetch_orcid import ORCID_API, ORCID_ID
 
 def fetch_orcid_education():
-    url = f"https://pub.orcid.org/v3.0/{ORCID_ID}/educations"
+    url = f"{ORCID_API}/{ORCID_ID}/educations"
     headers = {"Accept": "application/json"}
     
     try:
-        resp = requests.get(url, headers=headers)
+        resp = http_client.get(url, headers=headers)
         if resp.status_code == 200:
             data = resp.json()
             education_summary = data.get('education-summary', [])
@@ -35,11 +42,11 @@ def fetch_orcid_education():
         print(f"Error: {e}")
 
 def fetch_orcid_employment():
-    url = f"https://pub.orcid.org/v3.0/{ORCID_ID}/employments"
+    url = f"{ORCID_API}/{ORCID_ID}/employments"
     headers = {"Accept": "application/json"}
     
     try:
-        resp = requests.get(url, headers=headers)
+        resp = http_client.get(url, headers=headers)
         if resp.status_code == 200:
             data = resp.json()
             employment_summary = data.get('employment-summary', [])
@@ -64,3 +71,4 @@ def fetch_orcid_employment():
 if __name__ == "__main__":
     fetch_orcid_education()
     fetch_orcid_employment()
+    scheduler.print_stats()
@@ -0,0 +1,216 @@
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow running this file directly as well as importing it as scripts.fetch_orcid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import http_client, scheduler, trace
+from scripts.authors import author_fields, make_author
+from scripts.sources import check_cancelled
+from scripts.store import PublicationStore
+
+# ORCID works ingestion. The /works summary list is read once; works that
+# match a cached record by DOI or PMID are skipped through a normalized-ID
+# hash index, and the rest (e.g. Korean journals not indexed in PubMed) are
+# fetched through the bulk /works/{put-codes} endpoint, up to BULK_SIZE per
+# call, and stored under "orcid:<put-code>". A stored ORCID work is only
+# refetched when its last-modified date changes.
+
+ORCID_ID = "0000-0003-2749-0014"
+# Overridable to point at a local stand-in or the sandbox API
+ORCID_API = os.getenv("ORCID_API_BASE", "https://pub.orcid.org/v3.0")
+HEADERS = {"Accept": "application/json"}
+BULK_SIZE = 100
+BULK_WORKERS = 4
+KEY_PREFIX = "orcid:"
+
+CATEGORIES = {
+    "journal-article": "Original Article",
+    "review": "Review",
+    "book-chapter": "Book Chapter",
+    "conference-paper": "Conference Paper",
+    "preprint": "Preprint",
+}
+
+_DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+
+def normalize_doi(doi):
+    """Lowercased bare DOI ("https://doi.org/10.1/AbC" -> "10.1/abc"), or None."""
+    if not doi:
+        return None
+    return _DOI_PREFIX.sub("", doi.strip()).strip().lower() or None
+
+def _value(obj, *path):
+    for name in path:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(name)
+    return obj
+
+def external_ids(obj, kind):
+    return [eid.get("external-id-value") for eid in _value(obj, "external-ids", "external-id") or []
+            if eid.get("external-id-type") == kind and eid.get("external-id-value")]
+
+def fetch_summaries(orcid_id=ORCID_ID):
+    """One entry per work group: the preferred version's put code, last-modified, title and year, plus DOIs and PMIDs."""
+    resp = http_client.get(f"{ORCID_API}/{orcid_id}/works", headers=HEADERS)
+    resp.raise_for_status()
+    summaries = []
+    for group in resp.json().get("group", []):
+        versions = group.get("work-summary") or []
+        if not versions:
+            continue
+        preferred = max(versions, key=lambda s: int(s.get("display-index") or 0))
+        summaries.append({
+            "put_code": str(preferred["put-code"]),
+            "modified": _value(preferred, "last-modified-date", "value"),
+            "dois": {normalize_doi(d) for d in external_ids(group, "doi")} - {None},
+            "pmids": set(external_ids(group, "pmid")),
+            "title": _value(preferred, "title", "title", "value"),
+            "year": _value(preferred, "publication-date", "year", "value"),
+        })
+    return summaries
+
+def fetch_bulk(put_codes, orcid_id=ORCID_ID):
+    """Full work records for up to BULK_SIZE put codes in one call."""
+    resp = http_client.get(f"{ORCID_API}/{orcid_id}/works/{','.join(put_codes)}", headers=HEADERS)
+    resp.raise_for_status()
+    return [item["work"] for item in resp.json().get("bulk", []) if "work" in item]
+
+def fetch_works_bulk(put_codes, orcid_id=ORCID_ID, chunk_size=BULK_SIZE, workers=BULK_WORKERS):
+    chunks = [put_codes[i:i + chunk_size] for i in range(0, len(put_codes), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [work for works in pool.map(lambda chunk: fetch_bulk(chunk, orcid_id), chunks) for work in works]
+
+def parse_name(name):
+    """(last, initials) from an ORCID credit name: "Sangzin Ahn", "Ahn, Sangzin" or "Hyun-Jung Cho"."""
+    name = " ".join(name.split())
+    if "," in name:
+        last, _, given = (part.strip() for part in name.partition(","))
+    else:
+        given, _, last = name.rpartition(" ")
+    initials = "".join(part[0].upper() for part in re.split(r"[\s\-.]+", given) if part)
+    return last or given, initials
+
+def parse_work(work, orcid_id=ORCID_ID):
+    """Work dict in the publications cache format from a full ORCID work record."""
+    put_code = str(work.get("put-code"))
+    doi = normalize_doi(next(iter(external_ids(work, "doi")), None))
+    pmid = next(iter(external_ids(work, "pmid")), None)
+    year = _value(work, "publication-date", "year", "value")
+
+    author_list = []
+    for contributor in _value(work, "contributors", "contributor") or []:
+        name = _value(contributor, "credit-name", "value")
+        if name:
+            last, initials = parse_name(name)
+            author_list.append(make_author(last, initials, len(author_list) + 1))
+
+    url = (f"https://doi.org/{doi}" if doi else
+           _value(work, "url", "value") or f"https://orcid.org/{orcid_id}")
+    return {
+        "title": _value(work, "title", "title", "value"),
+        "year": int(year) if year and str(year).isdigit() else 0,
+        "journal": _value(work, "journal-title", "value"),
+        **author_fields(author_list),
+        "url": url,
+        "doi": doi,
+        "pmid": pmid,
+        "category": CATEGORIES.get(work.get("type"), "Original Article"),
+        "source": "orcid",
+        "orcid_id": orcid_id,
+        "orcid_put_code": put_code,
+        "orcid_modified": _value(work, "last-modified-date", "value"),
+    }
+
+def id_index(store):
+    """Normalized DOI / PMID -> key for every cached work that did not come from ORCID."""
+    index = {}
+    for key, pmid, doi in store.ids():
+        if key.startswith(KEY_PREFIX):
+            continue
+        if doi:
+            index[("doi", normalize_doi(doi))] = key
+        if pmid:
+            index[("pmid", pmid)] = key
+    return index
+
+def match(index, summary):
+    for doi in summary["dois"]:
+        if ("doi", doi) in index:
+            return index[("doi", doi)]
+    for pmid in summary["pmids"]:
+        if ("pmid", pmid) in index:
+            return index[("pmid", pmid)]
+    return None
+
+def sync_orcid(store, orcid_id=ORCID_ID, members=None):
+    """Merge ORCID-only works into ``store``; returns the number of records changed.
+
+    ORCID records that now match a PubMed record (or were removed from the
+    ORCID profile) are dropped; a theme already assigned is carried over to
+    the matching record. When a ``members`` set is given, the keys of every
+    work on this ORCID record (matched or ORCID-only) are added to it.
+    """
+    from scripts.fetch_pubmed import merge_refreshed
+
+    summaries = fetch_summaries(orcid_id)
+    index = id_index(store)
+    wanted, stale, changed = {}, [], 0
+    for summary in summaries:
+        key = KEY_PREFIX + summary["put_code"]
+        matched = match(index, summary)
+        if members is not None:
+            members.add(matched or key)
+        if matched:
+            if key in store:
+                stale.append((key, matched))
+            continue
+        existing = store.get(key)
+        if not existing or existing.get("orcid_modified") != summary["modified"]:
+            wanted[summary["put_code"]] = existing
+
+    live = {KEY_PREFIX + s["put_code"] for s in summaries}
+    # Only this ORCID record's works; a shared store can hold several
+    check_cancelled()
+    stale += [(key, None) for key in store.keys() if key.startswith(KEY_PREFIX) and key not in live
+              and store.get(key).get("orcid_id", ORCID_ID) == orcid_id]
+    for key, matched in stale:
+        old = store.get(key)
+        target = store.get(matched) if matched else None
+        if target is not None and old.get("theme") and not target.get("theme"):
+            changed += store.upsert(matched, {**target, "theme": old["theme"]})
+        changed += store.delete(key)
+
+    if wanted:
+        print(f"Fetching {len(wanted)} ORCID-only work(s) in bulk...")
+        works = fetch_works_bulk(list(wanted), orcid_id)
+        check_cancelled()
+        changed += store.upsert_many(
+            (KEY_PREFIX + work["orcid_put_code"],
+             merge_refreshed(wanted[work["orcid_put_code"]], work) if wanted.get(work["orcid_put_code"]) else work)
+            for work in (parse_work(w, orcid_id) for w in works))
+    print(f"ORCID: {len(summaries)} works, {len(summaries) - len(wanted)} matched or unchanged, "
+          f"{len(wanted)} fetched, {len(stale)} removed.")
+    check_cancelled()
+    store.save()
+    return changed
+
+def fetch_orcid_works():
+    """Sync ORCID into the cache and return every cached work, newest first.
+
+    An ORCID failure leaves the cache as it is.
+    """
+    with PublicationStore() as store:
+        try:
+            with trace.span("orcid.sync"):
+                sync_orcid(store)
+        except Exception as e:
+            print(f"Error syncing ORCID works: {e}")
+        return store.all_works()
+
+if __name__ == "__main__":
+    w = fetch_orcid_works()
+    print(f"{len(w)} cached works, {sum(1 for work in w if work.get('source') == 'orcid')} from ORCID only.")
+    scheduler.print_stats()
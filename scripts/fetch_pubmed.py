@@ -1,54 +1,141 @@
-import requests
+import sys
 import xml.etree.ElementTree as ET
 import time
 import os
 import json
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+# Allow running this file directly as well as importing it as scripts.fetch_pubmed
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import archive, http_client, scheduler, trace
+from scripts.sources import check_cancelled
+from scripts.store import PublicationStore
+from scripts.authors import author_fields, make_author
 
 # Combined search for variations
 SEARCH_TERM = "Ahn Sangzin[Author] OR Sangzin Ahn[Author]" 
 
-def fetch_pubmed_ids(term):
-    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    today = datetime.now().strftime("%Y/%m/%d")
-    # Search last 1 year (365 days)
-    # We can use reldate or explicit date range. reldate is easier.
+# Overridable to point at a local stand-in (scripts/eutils_stub.py)
+EUTILS_BASE = os.getenv("EUTILS_BASE", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+# Records per efetch call and how many calls may be in flight at once.
+# The request rate (3/s, or 10/s with NCBI_API_KEY) is enforced by
+# scripts/scheduler.py, so the pool only needs to be big enough to keep it
+# saturated while responses download. Throttled and 5xx responses are
+# retried there; EFETCH_RETRIES covers chunks that still fail or are truncated.
+EFETCH_CHUNK_SIZE = 200
+EFETCH_WORKERS = 6
+EFETCH_RETRIES = 3
+# esearch page size, and the most records one query can page through
+ESEARCH_PAGE_SIZE = 500
+ESEARCH_MAX_RECORDS = 9999
+ESEARCH_WORKERS = 6
+EARLIEST_YEAR = 1900
+# IDs collected from a search before their details are fetched in one epost
+STREAM_BATCH_SIZE = 1000
+# Keep every fetched PubmedArticle in the raw archive (scripts/archive.py)
+ARCHIVE_RAW = True
+
+# Last modification-date sync and per-record sync dates. Not committed (it
+# changes every run); the workflow keeps it in the Actions cache instead.
+SYNC_FILE = os.path.join(os.path.dirname(__file__), '../.cache/sync_state.json')
+# Look-back for the very first modification-date refresh
+REFRESH_DEFAULT_DAYS = 30
+# Fields PubMed never overwrites on refresh; a record can add more in "overrides"
+PRESERVED_FIELDS = ("theme",)
+
+def esearch(term, retstart=0, retmax=ESEARCH_PAGE_SIZE, **filters):
+    """One esearch page; returns (total count, list of IDs)."""
+    url = f"{EUTILS_BASE}/esearch.fcgi"
     params = {
         "db": "pubmed",
         "term": term,
         "retmode": "json",
-        "retmax": 100,
-        "reldate": 365  # Last 365 days
+        "retstart": retstart,
+        "retmax": retmax
     }
+    params.update(filters)
+    with trace.span("pubmed.esearch", retstart=retstart):
+        resp = http_client.get(url, params=params)
+    resp.raise_for_status()
+    result = resp.json().get('esearchresult', {})
+    return int(result.get('count', 0)), result.get('idlist', [])
+
+def iter_search_ids(term, page_size=ESEARCH_PAGE_SIZE, workers=ESEARCH_WORKERS, strict=False, **filters):
+    """Yield every PMID matching ``term``, one esearch page at a time.
+
+    ``filters`` are passed through to esearch (e.g. ``reldate=365`` or
+    ``mindate``/``maxdate``/``datetype``). An unbounded query with more hits
+    than esearch can page through is split into date windows that are
+    searched in parallel (see iter_windowed_ids). Errors end the stream with
+    a message unless ``strict`` is set, in which case they propagate.
+    """
     try:
-        resp = requests.get(url, params=params)
-        if resp.status_code == 200:
-            return resp.json().get('esearchresult', {}).get('idlist', [])
+        count, ids = esearch(term, 0, page_size, **filters)
+        if count > ESEARCH_MAX_RECORDS:
+            if not any(k in filters for k in ("reldate", "mindate", "maxdate")):
+                yield from iter_windowed_ids(term, page_size=page_size, workers=workers, strict=strict, **filters)
+                return
+            print(f"Warning: {count} hits for {term}; only the first {ESEARCH_MAX_RECORDS} can be paged.")
+
+        yield from ids
+        retstart = len(ids)
+        while ids and retstart < min(count, ESEARCH_MAX_RECORDS):
+            _, ids = esearch(term, retstart, page_size, **filters)
+            yield from ids
+            retstart += len(ids)
     except Exception as e:
+        if strict:
+            raise
         print(f"Error searching PubMed: {e}")
-    return []
+
+def split_date_window(term, start, end, datetype="pdat", **filters):
+    """Bisect [start, end] until every window has few enough hits to page through."""
+    count, _ = esearch(term, 0, 0, mindate=start.strftime("%Y/%m/%d"), maxdate=end.strftime("%Y/%m/%d"),
+                       datetype=datetype, **filters)
+    if count == 0:
+        return []
+    if count <= ESEARCH_MAX_RECORDS or start == end:
+        return [(start, end)]
+    middle = start + (end - start) // 2
+    return (split_date_window(term, start, middle, datetype, **filters) +
+            split_date_window(term, middle + timedelta(days=1), end, datetype, **filters))
+
+def iter_windowed_ids(term, start=None, end=None, datetype="pdat", page_size=ESEARCH_PAGE_SIZE,
+                      workers=ESEARCH_WORKERS, strict=False, **filters):
+    """Yield PMIDs for ``term`` by searching date windows in parallel.
+
+    Windows are yielded as they finish, so IDs reach the caller before the
+    whole search is done. Duplicates across windows are dropped.
+    """
+    start = start or date(EARLIEST_YEAR, 1, 1)
+    end = end or date.today()
+    windows = split_date_window(term, start, end, datetype, **filters)
+
+    def search_window(window):
+        return list(iter_search_ids(term, page_size, strict=strict, mindate=window[0].strftime("%Y/%m/%d"),
+                                    maxdate=window[1].strftime("%Y/%m/%d"), datetype=datetype, **filters))
+
+    seen = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(search_window, w) for w in windows]):
+            for pid in future.result():
+                if pid not in seen:
+                    seen.add(pid)
+                    yield pid
+
+def fetch_pubmed_ids(term):
+    # Search last 1 year (365 days)
+    return list(iter_search_ids(term, reldate=365))
 
 def format_author(last, initials, target_last="Ahn", target_initial="S"):
-    """Format author name and underline if it matches target."""
+    """Format author name and underline if it matches target (legacy string format)."""
     name = f"{last} {initials}"
     # Check match (case insensitive)
     if last.lower() == target_last.lower() and (initials.startswith(target_initial) or initials == target_initial):
         return f"<u>{name}</u>"
     return name
 
-CACHE_FILE = os.path.join(os.path.dirname(__file__), '../data/publications_cache.json')
-
-def load_cache():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-def save_cache(cache):
-    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
-
 def map_category(types):
     """Map PubMed types to simplified categories."""
     if "Review" in types: return "Review"
@@ -56,121 +143,297 @@ def map_category(types):
     if "Published Erratum" in types: return "Erratum"
     return "Original Article"
 
-def fetch_details_with_cache(ids):
-    cache = load_cache()
-    
-    # Identify what's missing
-    missing_ids = [pid for pid in ids if pid not in cache]
-    
+def fetch_details_with_cache(ids, store=None):
+    """Fetch details for any of ``ids`` not yet cached; returns the cached works.
+
+    ``ids`` may be a generator (e.g. iter_search_ids): missing IDs are fetched
+    in batches of STREAM_BATCH_SIZE while the search is still paging.
+    """
+    own_store = store is None
+    if own_store:
+        store = PublicationStore()
+
+    # Merge each chunk into the store as it arrives; every upsert_many is its
+    # own transaction, so an interrupted run keeps everything fetched so far.
+    # The JSON export is rewritten once at the end rather than per chunk.
+    def merge_chunk(works):
+        check_cancelled()
+        store.upsert_many((work['pmid'], work) for work in works)
+
+    requested, missing_ids = [], []
+    fetched = 0
+    for pid in ids:
+        requested.append(pid)
+        # Identify what's missing
+        if pid not in store:
+            missing_ids.append(pid)
+        if len(missing_ids) >= STREAM_BATCH_SIZE:
+            print(f"Fetching details for {len(missing_ids)} new papers...")
+            fetch_details(missing_ids, on_chunk=merge_chunk)
+            fetched += len(missing_ids)
+            missing_ids = []
+
     if missing_ids:
         print(f"Fetching details for {len(missing_ids)} new papers...")
-        new_works = fetch_details(missing_ids)
-        
-        # Update cache
-        for work in new_works:
-            cache[work['pmid']] = work
-            
-        save_cache(cache)
+        fetch_details(missing_ids, on_chunk=merge_chunk)
+        fetched += len(missing_ids)
+    if fetched:
+        check_cancelled()
+        store.save()
     else:
         print("All papers found in cache.")
         
     # Return all requested works from cache
-    return [cache[pid] for pid in ids if pid in cache]
+    works = [store.get(pid) for pid in requested]
+    if own_store:
+        store.close()
+    return [work for work in works if work]
 
-def fetch_details(ids):
-    # ... (existing fetch_details logic but adapted to return dict with PMID key or just list) ...
-    # Actually, easiest is to keep fetch_details as is (fetching list) and wrap it.
-    # But wait, fetch_details takes a list of IDs.
-    
-    if not ids: return []
-    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+def post_ids(ids):
+    """Upload IDs to the E-utilities history server; returns (WebEnv, query_key)."""
+    url = f"{EUTILS_BASE}/epost.fcgi"
+    resp = http_client.post(url, data={"db": "pubmed", "id": ",".join(ids)})
+    resp.raise_for_status()
+    root = ET.fromstring(resp.content)
+    webenv = root.findtext("WebEnv")
+    query_key = root.findtext("QueryKey")
+    if not webenv or not query_key:
+        raise ValueError(root.findtext("ERROR") or "epost returned no WebEnv")
+    return webenv, query_key
+
+def fetch_chunk(webenv, query_key, retstart, retmax):
+    """Fetch and parse one slice of a history-server result set."""
+    url = f"{EUTILS_BASE}/efetch.fcgi"
     params = {
         "db": "pubmed",
-        "id": ",".join(ids),
+        "query_key": query_key,
+        "WebEnv": webenv,
+        "retstart": retstart,
+        "retmax": retmax,
         "retmode": "xml"
     }
-    
-    works = []
+    with trace.span("pubmed.efetch", retstart=retstart), http_client.post(url, data=params, stream=True) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        works = list(iter_articles(resp.raw, archive_raw=ARCHIVE_RAW))
+        http_client.count_streamed(resp)
+        trace.count("pubmed.records", len(works))
+        return works
+
+def fetch_details(ids, chunk_size=EFETCH_CHUNK_SIZE, workers=EFETCH_WORKERS, on_chunk=None):
+    """Fetch PubMed records for ``ids`` in chunks via the history server.
+
+    IDs are posted once with epost, then pulled back ``chunk_size`` records
+    at a time by up to ``workers`` concurrent efetch calls. ``on_chunk`` is
+    called with each chunk's works as soon as it is parsed. Failed chunks are
+    retried on their own; chunks that already succeeded are never refetched.
+    """
+    if not ids: return []
+
     try:
-        resp = requests.get(url, params=params)
-        if resp.status_code != 200:
-            print(f"Error fetching details: {resp.status_code}")
-            return []
-            
-        root = ET.fromstring(resp.content)
-        
-        for article in root.findall(".//PubmedArticle"):
-            # ... (extraction logic) ...
-            title = article.findtext(".//ArticleTitle")
-            
-            # year
-            pub_date = article.find(".//PubDate")
-            year = pub_date.findtext("Year")
-            if not year:
-                medline_date = pub_date.findtext("MedlineDate")
-                if medline_date: year = medline_date[:4]
-            
-            # Journal
-            journal = article.findtext(".//Journal/ISOAbbreviation") or article.findtext(".//Journal/Title")
-            
-            # DOI / PMID
-            pmid = article.findtext(".//PMID")
-            doi = None
-            for id_elem in article.findall(".//ArticleIdList/ArticleId"):
-                if id_elem.get("IdType") == "doi":
-                    doi = id_elem.text
-                    break
-            url_link = f"https://doi.org/{doi}" if doi else f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-            
-            # Authors
-            author_list = []
-            for auth in article.findall(".//AuthorList/Author"):
-                last = auth.findtext("LastName")
-                initials = auth.findtext("Initials")
-                if last and initials:
-                    author_list.append(format_author(last, initials))
-                elif auth.findtext("CollectiveName"):
-                    author_list.append(auth.findtext("CollectiveName"))
-            
-            # Categories
-            types = [t.text for t in article.findall(".//PublicationTypeList/PublicationType")]
-            category = map_category(types)
-
-            works.append({
-                "title": title,
-                "year": int(year) if year and year.isdigit() else 0,
-                "journal": journal,
-                "authors": ", ".join(author_list),
-                "url": url_link,
-                "doi": doi,
-                "pmid": pmid,
-                "category": category
-            })
-            
+        webenv, query_key = post_ids(ids)
     except Exception as e:
-        print(f"Error parsing XML: {e}")
-        
+        print(f"Error posting IDs to history server: {e}")
+        return []
+
+    works = []
+    pending = list(range(0, len(ids), chunk_size))
+    for attempt in range(EFETCH_RETRIES):
+        if not pending:
+            break
+        if attempt:
+            time.sleep(2 ** attempt)
+            print(f"Retrying {len(pending)} failed chunk(s)...")
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(fetch_chunk, webenv, query_key, start, chunk_size): start
+                for start in pending
+            }
+            for future in as_completed(futures):
+                start = futures[future]
+                try:
+                    chunk = future.result()
+                except Exception as e:
+                    print(f"Error fetching records {start}-{start + chunk_size}: {e}")
+                    failed.append(start)
+                    continue
+                works.extend(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+        pending = failed
+
+    if pending:
+        print(f"Gave up on {len(pending)} chunk(s) after {EFETCH_RETRIES} attempts.")
     return works
 
+def iter_articles(source, archive_raw=False):
+    """Stream work dicts out of an efetch XML response.
+
+    ``source`` is a file-like object (e.g. ``resp.raw``) or a filename. The
+    body is read incrementally and each ``PubmedArticle`` is discarded as soon
+    as it has been parsed, so memory stays flat regardless of response size.
+    With ``archive_raw`` each article's XML is also kept in the raw archive.
+    Malformed XML raises, so a truncated chunk is retried rather than
+    silently treated as empty.
+    """
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == "PubmedArticle":
+            if archive_raw:
+                archive.put_element(elem)
+            yield parse_article(elem)
+            # Drop the finished article (and anything before it) from the tree
+            root.clear()
+
+def parse_article(article):
+    """Extract a work dict from one ``PubmedArticle`` element."""
+    citation = article.find("MedlineCitation")
+    info = citation.find("Article")
+    journal_elem = info.find("Journal")
+
+    title = info.findtext("ArticleTitle")
+
+    # year
+    year = None
+    pub_date = journal_elem.find("JournalIssue/PubDate")
+    if pub_date is not None:
+        year = pub_date.findtext("Year")
+        if not year:
+            medline_date = pub_date.findtext("MedlineDate")
+            if medline_date: year = medline_date[:4]
+
+    # Journal
+    journal = journal_elem.findtext("ISOAbbreviation") or journal_elem.findtext("Title")
+
+    # DOI / PMID
+    pmid = citation.findtext("PMID")
+    doi = None
+    for id_elem in article.iterfind("PubmedData/ArticleIdList/ArticleId"):
+        if id_elem.get("IdType") == "doi":
+            doi = id_elem.text
+            break
+    url_link = f"https://doi.org/{doi}" if doi else f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+
+    # Authors, as compact rows; markup is added at render time
+    author_list = []
+    for auth in info.iterfind("AuthorList/Author"):
+        last = auth.findtext("LastName")
+        initials = auth.findtext("Initials")
+        if last and initials:
+            author_list.append(make_author(last, initials, len(author_list) + 1))
+        elif auth.findtext("CollectiveName"):
+            author_list.append(make_author(auth.findtext("CollectiveName"), "", len(author_list) + 1))
+
+    # Categories
+    types = [t.text for t in info.iterfind("PublicationTypeList/PublicationType")]
+    category = map_category(types)
+
+    return {
+        "title": title,
+        "year": int(year) if year and year.isdigit() else 0,
+        "journal": journal,
+        **author_fields(author_list),
+        "url": url_link,
+        "doi": doi,
+        "pmid": pmid,
+        "category": category
+    }
+
+def load_sync_state():
+    if os.path.exists(SYNC_FILE):
+        with open(SYNC_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"last_sync": None, "records": {}}
+
+def save_sync_state(state):
+    os.makedirs(os.path.dirname(SYNC_FILE), exist_ok=True)
+    with open(SYNC_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+def merge_refreshed(existing, fetched):
+    """Apply freshly fetched fields to a cached record, keeping manual overrides."""
+    keep = set(PRESERVED_FIELDS) | set(existing.get("overrides", []))
+    merged = dict(existing)
+    for field, value in fetched.items():
+        if field not in keep:
+            merged[field] = value
+    return merged
+
+def refresh_modified(store, term=SEARCH_TERM, since=None):
+    """Refetch cached records PubMed has modified since the last sync.
+
+    Searches ``term`` by modification date (datetype=mdat), so the cost is
+    proportional to the number of changed records, not the cache size.
+    Returns the number of records whose cached content changed.
+    """
+    state = load_sync_state()
+    today = date.today()
+    if since is None:
+        since = state.get("last_sync") or (today - timedelta(days=REFRESH_DEFAULT_DAYS)).strftime("%Y/%m/%d")
+
+    print(f"Checking for records modified since {since}...")
+    try:
+        modified = [pid for pid in iter_search_ids(term, strict=True, datetype="mdat", mindate=since,
+                                                   maxdate=today.strftime("%Y/%m/%d"))
+                    if pid in store]
+    except Exception as e:
+        print(f"Error searching for modified records: {e}")
+        return 0
+
+    changed = 0
+    refreshed = set()
+    if modified:
+        print(f"Refreshing {len(modified)} modified record(s)...")
+
+        def merge_chunk(works):
+            nonlocal changed
+            check_cancelled()
+            merged = [(work['pmid'], merge_refreshed(store.get(work['pmid']) or {}, work)) for work in works]
+            changed += store.upsert_many(merged)
+            for pid, _ in merged:
+                state["records"][pid] = today.isoformat()
+                refreshed.add(pid)
+
+        fetch_details(modified, on_chunk=merge_chunk)
+        check_cancelled()
+        store.save()
+        print(f"{changed} record(s) changed.")
+
+    # New records count as synced the first time they are seen
+    for pid in store.keys():
+        state["records"].setdefault(pid, today.isoformat())
+    # Only move the window forward once every modified record has been merged
+    if refreshed.issuperset(modified):
+        state["last_sync"] = today.strftime("%Y/%m/%d")
+    else:
+        print(f"{len(set(modified) - refreshed)} record(s) could not be refreshed; will retry next run.")
+    check_cancelled()
+    save_sync_state(state)
+    return changed
+
 def fetch_works():
     print(f"Searching PubMed for: {SEARCH_TERM}")
-    ids = fetch_pubmed_ids(SEARCH_TERM)
-    print(f"Found {len(ids)} papers.")
-    
-    if ids:
-        # Update cache with any new findings
-        fetch_details_with_cache(ids)
-    
-    # Return ALL papers from cache, not just the recent search results
-    cache = load_cache()
-    all_works = list(cache.values())
-    
-    # Sort by year desc
-    all_works.sort(key=lambda x: x['year'], reverse=True)
-    return all_works
+    with PublicationStore() as store:
+        # Stream search results straight into the cache (last 365 days)
+        with trace.span("pubmed.search_and_fetch"):
+            found = fetch_details_with_cache(iter_search_ids(SEARCH_TERM, reldate=365), store)
+        print(f"Found {len(found)} papers.")
+
+        # Pick up corrections and ahead-of-print updates to older records
+        with trace.span("pubmed.refresh"):
+            refresh_modified(store)
+
+        # Return ALL papers from cache, not just the recent search results,
+        # sorted by year desc (served by the year index)
+        return store.all_works()
 
 if __name__ == "__main__":
     w = fetch_works()
     print(f"Fetched {len(w)} items.")
+    scheduler.print_stats()
+    trace.write("fetch_pubmed")
     if w:
         print(w[0])
@@ -1,50 +1,120 @@
-import feedparser
 import json
-import re
+import os
+import sys
+from datetime import datetime, timezone
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scripts import trace
+from scripts.sources import check_cancelled
 
 PLAYLIST_ID = "PL0TnWnPQhDj2-TOwiz_ZhY2Sdurimss2Q"
-# Use Web URL for yt-dlp, not RSS
-VIDEO_URL = f"https://www.youtube.com/playlist?list={PLAYLIST_ID}"
+# The playlist's Atom feed is the primary backend; the web URL is only for yt-dlp
+FEED_BASE = os.getenv("YOUTUBE_FEED_BASE", "https://www.youtube.com/feeds/videos.xml")
+VIDEO_URL = "https://www.youtube.com/playlist?list={}"
+MAX_VIDEOS = 3
+
+# Last successfully fetched playlist entries, used when YouTube is unreachable.
+# The functions below default to PLAYLIST_ID and VIDEO_CACHE_FILE; a
+# multi-profile build passes each profile's own from its fetch threads.
+VIDEO_CACHE_FILE = os.path.join(os.path.dirname(__file__), '../data/videos_cache.json')
+
+def load_cached_videos(cache_file=None):
+    cache_file = cache_file or VIDEO_CACHE_FILE
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return []
+
+def save_cached_videos(videos, cache_file=None):
+    cache_file = cache_file or VIDEO_CACHE_FILE
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(videos, f, ensure_ascii=False, indent=2)
+
+def make_video(video_id, title, published=""):
+    return {
+        "title": title,
+        "link": f"https://www.youtube.com/watch?v={video_id}",
+        "published": published,
+        "video_id": video_id,
+        "thumbnail": f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+    }
+
+def parse_feed(content):
+    """Videos from a playlist Atom feed, in playlist order, with ISO publish dates."""
+    import feedparser
+
+    feed = feedparser.parse(content)
+    videos = []
+    for entry in feed.entries[:MAX_VIDEOS]:
+        video_id = entry.get("yt_videoid")
+        if not video_id:
+            continue
+        published = entry.get("published_parsed")
+        published = datetime(*published[:6], tzinfo=timezone.utc).strftime("%Y-%m-%d") if published else ""
+        videos.append(make_video(video_id, entry.get("title", ""), published))
+    return videos
 
-import requests
-import time
+def fetch_feed_videos(playlist_id, cache_file=None):
+    """Fetch the playlist feed; an unchanged feed (304) is answered from the local snapshot."""
+    from scripts import http_client
 
-import yt_dlp
+    resp = http_client.get(FEED_BASE, params={"playlist_id": playlist_id})
+    resp.raise_for_status()
+    if resp.from_cache:
+        cached = load_cached_videos(cache_file)
+        if cached:
+            print("Playlist feed unchanged (304); using local snapshot.")
+            return cached
+    videos = parse_feed(resp.content)
+    if not videos:
+        raise ValueError("playlist feed has no entries")
+    print(f"Fetched {len(videos)} videos from the playlist feed.")
+    return videos
+
+def fetch_ytdlp_videos(playlist_id, cache_file=None):
+    """Fallback: flat playlist extraction with yt-dlp (no publish dates)."""
+    # yt-dlp takes a noticeable time to import; only pay for it when needed
+    import yt_dlp
 
-def fetch_videos():
-    print(f"Fetching YouTube playlist: {PLAYLIST_ID}...")
-    
     ydl_opts = {
         'quiet': True,
         'extract_flat': True,
         'dump_single_json': True,
-        'playlist_items': '1-3' # Fetch top 3 only
+        'playlist_items': f'1-{MAX_VIDEOS}'
     }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        result = ydl.extract_info(VIDEO_URL.format(playlist_id), download=False)
+    # Flat extraction has no upload dates; keep any the snapshot already knows
+    known = {v["video_id"]: v.get("published", "") for v in load_cached_videos(cache_file)}
+    videos = [make_video(e['id'], e['title'], known.get(e['id'], "")) for e in result.get('entries') or []]
+    print(f"Fetched {len(videos)} videos using yt-dlp.")
+    return videos
+
+def fetch_videos(playlist_id=None, cache_file=None):
+    playlist_id = playlist_id or PLAYLIST_ID
+    print(f"Fetching YouTube playlist: {playlist_id}...")
+
+    for backend in (fetch_feed_videos, fetch_ytdlp_videos):
+        try:
+            with trace.span(f"youtube.{backend.__name__}"):
+                videos = backend(playlist_id, cache_file)
+        except Exception as e:
+            print(f"Error fetching YouTube with {backend.__name__}: {e}")
+            continue
+        if not videos:
+            print("No entries found in playlist.")
+            continue
+        check_cancelled()
+        if videos != load_cached_videos(cache_file):
+            save_cached_videos(videos, cache_file)
+        return videos
 
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            result = ydl.extract_info(VIDEO_URL, download=False)
-            
-            if 'entries' in result:
-                videos = []
-                for entry in result['entries']:
-                    videos.append({
-                        "title": entry['title'],
-                        "link": f"https://www.youtube.com/watch?v={entry['id']}",
-                        "published": "", # yt-dlp flat extraction might not have date, skipping
-                        "video_id": entry['id'],
-                        "thumbnail": f"https://img.youtube.com/vi/{entry['id']}/hqdefault.jpg"
-                    })
-                
-                print(f"Fetched {len(videos)} videos using yt-dlp.")
-                return videos
-            else:
-                print("No entries found in playlist.")
-                return []
-
-    except Exception as e:
-        print(f"Error fetching YouTube with yt-dlp: {e}")
-        return []
+    return load_cached_videos(cache_file)
 
 if __name__ == "__main__":
     v = fetch_videos()
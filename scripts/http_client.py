@@ -0,0 +1,220 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from scripts import scheduler, trace
+
+# Shared HTTP client for every fetch script: one pooled session with
+# keep-alive, default timeouts, gzip, and an on-disk cache of GET responses
+# that is revalidated with ETag / Last-Modified. Every request goes through
+# scripts/scheduler.py for per-host rate limiting and retries.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'http')
+
+# (connect, read) seconds; a hung endpoint fails instead of stalling the build
+DEFAULT_TIMEOUT = (5, 30)
+POOL_CONNECTIONS = 8   # distinct hosts kept alive
+POOL_MAXSIZE = 10      # concurrent connections per host
+USER_AGENT = "mahlernim.github.io site builder (+https://github.com/mahlernim/mahlernim.github.io)"
+
+# Record/replay fixtures: with HTTP_FIXTURES=record every response is saved
+# under HTTP_FIXTURES_DIR; with HTTP_FIXTURES=replay responses come only from
+# there and nothing touches the network.
+FIXTURES_MODE = os.getenv("HTTP_FIXTURES", "")
+FIXTURES_DIR = os.getenv("HTTP_FIXTURES_DIR", os.path.join(BASE_DIR, '.cache', 'fixtures'))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Accept-Encoding": "gzip, deflate",
+                    "User-Agent": USER_AGENT
+                })
+                _session = session
+    return _session
+
+def _send(method, url, params=None, data=None, retries=scheduler.MAX_RETRIES, **kwargs):
+    """One rate-limited, retried request through the shared session.
+
+    E-utilities requests carry NCBI_API_KEY when it is set; it is added here
+    so cache and fixture keys do not depend on it. ``retries`` caps the
+    scheduler's retries for callers on a time budget.
+    """
+    host = scheduler.host_of(url)
+    if host == scheduler.NCBI_HOST and scheduler.NCBI_API_KEY:
+        if method == "GET":
+            params = {**(params or {}), "api_key": scheduler.NCBI_API_KEY}
+        else:
+            data = {**(data or {}), "api_key": scheduler.NCBI_API_KEY}
+    session = get_session()
+    resp = scheduler.call(host, lambda: session.request(method, url, params=params, data=data, **kwargs),
+                          retry_on=(requests.ConnectionError, requests.Timeout), retries=retries)
+    trace.count("http.requests")
+    if not kwargs.get("stream"):
+        # Streamed bodies are counted by the caller once read (count_streamed)
+        trace.count("http.bytes", len(resp.content))
+    return resp
+
+def count_streamed(resp):
+    """Add a fully read streamed response's wire bytes to the trace counters."""
+    try:
+        trace.count("http.bytes", resp.raw.tell())
+    except (AttributeError, OSError):
+        pass
+
+def _cache_key(url, params, headers):
+    raw = json.dumps([url, sorted((params or {}).items()), sorted((headers or {}).items())], default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _cache_paths(key):
+    return os.path.join(CACHE_DIR, key + '.json'), os.path.join(CACHE_DIR, key + '.body')
+
+def _load_entry(key):
+    meta_path, body_path = _cache_paths(key)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None, None
+    return meta, body
+
+def _store_entry(key, resp):
+    meta = {
+        "url": resp.url,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "headers": {k: v for k, v in resp.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")},
+        "encoding": resp.encoding
+    }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta_path, body_path = _cache_paths(key)
+    # Write to temp files first so concurrent readers never see half an entry
+    for path, data, mode in ((body_path, resp.content, 'wb'), (meta_path, json.dumps(meta), 'w')):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, mode) as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+def _response_from_cache(meta, body):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = meta["url"]
+    resp.headers = CaseInsensitiveDict(meta["headers"])
+    resp.encoding = meta["encoding"]
+    resp._content = body
+    resp.from_cache = True
+    return resp
+
+class _ReplayBody(io.BytesIO):
+    """Stands in for ``resp.raw`` so streamed responses can be replayed."""
+    decode_content = True
+
+def _fixture_key(method, url, params, data):
+    raw = json.dumps([method, url, sorted((params or {}).items()), sorted((data or {}).items())], default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _fixture_response(meta, body):
+    resp = requests.Response()
+    resp.status_code = meta["status"]
+    resp.url = meta["url"]
+    resp.headers = CaseInsensitiveDict(meta["headers"])
+    resp.encoding = meta["encoding"]
+    resp._content = body
+    resp.raw = _ReplayBody(body)
+    resp.from_cache = False
+    return resp
+
+def _replay(method, url, params, data):
+    key = _fixture_key(method, url, params, data)
+    try:
+        with open(os.path.join(FIXTURES_DIR, key + '.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(FIXTURES_DIR, key + '.body'), 'rb') as f:
+            body = f.read()
+    except OSError:
+        raise requests.ConnectionError(f"No recorded fixture for {method} {url} {params or data}")
+    return _fixture_response(meta, body)
+
+def _record(method, url, params, data, resp):
+    body = resp.content  # reads streamed bodies in full
+    meta = {
+        "method": method,
+        "url": resp.url,
+        "request": {"params": params, "data": data},
+        "status": resp.status_code,
+        "headers": {k: v for k, v in resp.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")},
+        "encoding": resp.encoding
+    }
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    key = _fixture_key(method, url, params, data)
+    with open(os.path.join(FIXTURES_DIR, key + '.body'), 'wb') as f:
+        f.write(body)
+    with open(os.path.join(FIXTURES_DIR, key + '.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, default=str)
+    return _fixture_response(meta, body)
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, use_cache=True, **kwargs):
+    """GET through the shared session.
+
+    When ``use_cache`` is set, a previously stored response is revalidated
+    with If-None-Match / If-Modified-Since; a 304 is answered from disk and
+    the returned response carries ``from_cache = True``.
+    """
+    if FIXTURES_MODE == "replay":
+        return _replay("GET", url, params, None)
+    if FIXTURES_MODE == "record":
+        return _record("GET", url, params, None, _send("GET", url, params=params, headers=headers, timeout=timeout, **kwargs))
+
+    if not use_cache or kwargs.get("stream"):
+        return _send("GET", url, params=params, headers=headers, timeout=timeout, **kwargs)
+
+    key = _cache_key(url, params, headers)
+    meta, body = _load_entry(key)
+    request_headers = dict(headers or {})
+    if meta:
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    resp = _send("GET", url, params=params, headers=request_headers, timeout=timeout, **kwargs)
+    if resp.status_code == 304 and meta:
+        trace.count("http.cache_hit")
+        return _response_from_cache(meta, body)
+
+    trace.count("http.cache_miss")
+    resp.from_cache = False
+    if resp.status_code == 200 and (resp.headers.get("ETag") or resp.headers.get("Last-Modified")):
+        try:
+            _store_entry(key, resp)
+        except OSError as e:
+            print(f"Warning: could not write HTTP cache entry: {e}")
+    return resp
+
+def post(url, data=None, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """POST through the shared session (never cached)."""
+    if FIXTURES_MODE == "replay":
+        return _replay("POST", url, None, data)
+    resp = _send("POST", url, data=data, headers=headers, timeout=timeout, **kwargs)
+    if FIXTURES_MODE == "record":
+        return _record("POST", url, None, data, resp)
+    return resp
@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scripts import authors, fetch_pubmed, scheduler, sources, trace
+from scripts import store as store_module
+
+# Multi-profile builds: one site per researcher listed in profiles.json,
+# each with its own PubMed queries, target author, ORCID record, playlist and
+# author block, written to its own output directory.
+#
+# Every profile shares one publication store (data/profiles/), so a paper
+# found by several profiles' searches is fetched and parsed once. Fetching
+# runs in this process with a thread per profile, so all of them draw on the
+# same per-host rate limits in scripts/scheduler.py. Playlists and their
+# thumbnails are fetched as one source per profile (scripts/sources.py), so
+# each has the build's videos deadline and falls back to its cached entries.
+# Rendering, which is CPU-bound and offline, runs one profile per worker
+# process and is handed the videos. Each profile's works are
+# the union of its searches and its ORCID record, kept in membership.json
+# so later runs only need to search the last year.
+
+CONFIG_FILE = os.path.join(parent_dir, 'profiles.json')
+PROFILES_DIR = os.path.join(parent_dir, 'data', 'profiles')
+MEMBERSHIP_FILE = os.path.join(PROFILES_DIR, 'membership.json')
+REPORT_FILE = os.path.join(PROFILES_DIR, 'report.json')
+SEARCH_WORKERS = 4
+RENDER_WORKERS = 4
+# Seconds from the start of the fetch stage, as for the build's videos source
+VIDEOS_DEADLINE = 90
+# Fields every profile must set; nothing falls back to the single-site owner
+REQUIRED_FIELDS = ("name", "search_terms", "target_author", "author")
+
+def load_profiles(path=CONFIG_FILE):
+    """Profiles from the config file.
+
+    Raises ValueError if a profile lacks one of REQUIRED_FIELDS. A missing
+    ``orcid_id`` or ``playlist_id`` means that source is skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    output_root = os.path.join(parent_dir, config.get("output_root", "sites"))
+    profiles = []
+    for i, entry in enumerate(config["profiles"]):
+        missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing:
+            raise ValueError(f"{os.path.basename(path)}: profile {entry.get('name') or i + 1} "
+                             f"is missing {', '.join(missing)}")
+        if len(entry["target_author"]) != 2:
+            raise ValueError(f"{os.path.basename(path)}: profile {entry['name']} target_author "
+                             f"must be [last name, initial]")
+        name = entry["name"]
+        profiles.append({
+            "name": name,
+            "term": " OR ".join(entry["search_terms"]),
+            "target": tuple(entry["target_author"]),
+            "orcid_id": entry.get("orcid_id"),
+            "playlist_id": entry.get("playlist_id"),
+            "author": entry["author"],
+            "output_dir": os.path.join(parent_dir, entry["output_dir"]) if entry.get("output_dir")
+                          else os.path.join(output_root, name),
+            "data_dir": os.path.join(PROFILES_DIR, name),
+        })
+    return profiles
+
+def use_shared_store():
+    """Point the store and PubMed sync state at the shared multi-profile files."""
+    store_module.DB_FILE = os.path.join(PROFILES_DIR, 'publications.db')
+    store_module.CACHE_FILE = os.path.join(PROFILES_DIR, 'publications_cache.json')
+    fetch_pubmed.SYNC_FILE = os.path.join(parent_dir, '.cache', 'profiles', 'sync_state.json')
+
+def video_files(profile):
+    """(playlist cache, thumbnail directory, thumbnail manifest) paths of a profile."""
+    return (os.path.join(profile["data_dir"], 'videos_cache.json'),
+            os.path.join(profile["output_dir"], 'static', 'thumbs'),
+            os.path.join(profile["data_dir"], 'thumbnails.json'))
+
+def cached_profile_videos(profiles):
+    """Each profile's last fetched playlist entries, without network access."""
+    from scripts.fetch_youtube import load_cached_videos
+
+    return {profile["name"]: load_cached_videos(video_files(profile)[0]) if profile["playlist_id"] else []
+            for profile in profiles}
+
+def fetch_profile_videos(profiles):
+    """Each profile's playlist and missing thumbnails, one source thread per profile.
+
+    Returns (videos by profile name, sources report by profile name). A
+    playlist that fails or misses VIDEOS_DEADLINE falls back to its cache.
+    """
+    from scripts.fetch_youtube import fetch_videos, load_cached_videos
+    from scripts.thumbnails import download_thumbnails
+
+    names = {}
+    for profile in profiles:
+        if not profile["playlist_id"]:
+            continue
+        cache_file, thumb_dir, manifest_file = video_files(profile)
+
+        def fetch(profile=profile, cache_file=cache_file, thumb_dir=thumb_dir, manifest_file=manifest_file):
+            videos = fetch_videos(profile["playlist_id"], cache_file)
+            with trace.span("thumbnails.download", profile=profile["name"]):
+                download_thumbnails(videos, thumb_dir=thumb_dir, manifest_file=manifest_file)
+            return videos
+
+        names[profile["name"]] = f"videos.{profile['name']}"
+        sources.register_source(names[profile["name"]], fetch, deadline=VIDEOS_DEADLINE,
+                                fallback=lambda cache_file=cache_file: load_cached_videos(cache_file))
+    results, report = sources.run_sources(list(names.values()))
+    videos = {profile["name"]: results.get(names.get(profile["name"])) or [] for profile in profiles}
+    return videos, {name: report[source] for name, source in names.items()}
+
+def load_membership():
+    if os.path.exists(MEMBERSHIP_FILE):
+        with open(MEMBERSHIP_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_membership(membership):
+    os.makedirs(os.path.dirname(MEMBERSHIP_FILE), exist_ok=True)
+    with open(MEMBERSHIP_FILE, 'w', encoding='utf-8') as f:
+        json.dump(membership, f, indent=1, sort_keys=True)
+
+def search_profile(profile, known):
+    """PMIDs for one profile: the last year if its query was searched before, else everything.
+
+    Returns (ids, seconds); ids is None if the search failed.
+    """
+    start = time.perf_counter()
+    filters = {"reldate": 365} if known else {}
+    try:
+        with trace.span("profiles.search", profile=profile["name"]):
+            ids = list(fetch_pubmed.iter_search_ids(profile["term"], strict=True, **filters))
+    except Exception as e:
+        print(f"Error searching PubMed for {profile['name']}: {e}")
+        ids = None
+    return ids, time.perf_counter() - start
+
+def fetch_profiles(profiles):
+    """Update the shared store and fetch every profile's videos.
+
+    Returns (membership, videos by profile name, fetch report).
+    """
+    from scripts.fetch_orcid import sync_orcid
+
+    # Rows are parsed once for every profile, so each row flags every target
+    authors.TARGETS = [profile["target"] for profile in profiles]
+    membership = load_membership()
+    timings = {profile["name"]: {} for profile in profiles}
+
+    # Playlists don't depend on the publications; fetch them alongside
+    background = ThreadPoolExecutor(max_workers=1)
+    videos_future = background.submit(fetch_profile_videos, profiles)
+    background.shutdown(wait=False)
+
+    with store_module.PublicationStore() as store:
+        # 1. Each profile's PubMed search, in parallel under the shared rate limit
+        def known(profile):
+            return membership.get(profile["name"], {}).get("term") == profile["term"]
+
+        with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as pool:
+            results = dict(zip([p["name"] for p in profiles],
+                               pool.map(lambda p: search_profile(p, known(p)), profiles)))
+        found, searched = {}, {}
+        for profile in profiles:
+            ids, seconds = results[profile["name"]]
+            searched[profile["name"]] = ids is not None
+            found[profile["name"]] = ids or []
+            timings[profile["name"]]["search"] = round(seconds, 3)
+
+        # 2. One efetch pass over the union; co-authored papers are fetched once
+        unique = list(dict.fromkeys(pid for ids in found.values() for pid in ids))
+        total = sum(len(ids) for ids in found.values())
+        missing = sum(1 for pid in unique if pid not in store)
+        print(f"PubMed: {total} IDs over {len(profiles)} profile(s), {len(unique)} unique, {missing} not cached.")
+        with trace.span("profiles.fetch"):
+            fetch_pubmed.fetch_details_with_cache(unique, store)
+        with trace.span("profiles.refresh"):
+            fetch_pubmed.refresh_modified(store, term=" OR ".join(f"({p['term']})" for p in profiles))
+
+        # 3. ORCID, per profile, matched against the whole shared store
+        for profile in profiles:
+            entry = membership.get(profile["name"], {})
+            members = set(entry.get("keys", [])) if known(profile) else set()
+            members.update(found[profile["name"]])
+            if profile["orcid_id"]:
+                start = time.perf_counter()
+                try:
+                    with trace.span("profiles.orcid", profile=profile["name"]):
+                        sync_orcid(store, profile["orcid_id"], members)
+                except Exception as e:
+                    print(f"Error syncing ORCID works for {profile['name']}: {e}")
+                    members.update(k for k in entry.get("keys", []) if k.startswith("orcid:"))
+                timings[profile["name"]]["orcid"] = round(time.perf_counter() - start, 3)
+            # Keys that no longer exist (ORCID works since matched or removed)
+            members = {key for key in members if key in store}
+            # A failed first search keeps the old term, so the next run searches in full
+            term = profile["term"] if searched[profile["name"]] else entry.get("term")
+            membership[profile["name"]] = {"term": term, "keys": sorted(members)}
+        save_membership(membership)
+
+    videos, video_report = videos_future.result()
+    for name, entry in video_report.items():
+        timings[name]["videos"] = entry["seconds"]
+        if entry["status"] != "ok":
+            timings[name]["videos_status"] = entry["status"]
+
+    report = {"ids_total": total, "ids_unique": len(unique), "fetched": missing, "profiles": timings}
+    return membership, videos, report
+
+def render_profile(profile, keys, videos, shared, force=False):
+    """Worker: render one profile's site from the store and its fetched videos (runs in a child process)."""
+    import build
+    from scripts import assets, shards, thumbnails
+
+    start = time.perf_counter()
+    # Per-profile settings; a pool process may render several profiles in turn
+    data_dir, output_dir = profile["data_dir"], profile["output_dir"]
+    store_module.DB_FILE, store_module.CACHE_FILE = shared
+    authors.TARGETS = [tuple(profile["target"])]
+    _, thumbnails.THUMB_DIR, thumbnails.MANIFEST_FILE = video_files(profile)
+    shards.SHARD_DIR = os.path.join(output_dir, 'static', 'pubs')
+    build.MANIFEST_FILE = os.path.join(data_dir, 'build_manifest.json')
+    assets.REPORT_FILE = os.path.join(data_dir, 'asset_report.json')
+    os.makedirs(output_dir, exist_ok=True)
+
+    timings = {}
+    render_start = time.perf_counter()
+    with store_module.PublicationStore(sync=False) as store:
+        publications = store.select(keys)
+    written = build.render_site(publications, videos, author=profile["author"], output_dir=output_dir,
+                                force=force, fetch_thumbnails=False)
+    timings["render"] = round(time.perf_counter() - render_start, 3)
+    timings["total"] = round(time.perf_counter() - start, 3)
+    return {"works": len(publications), "video_count": len(videos), "written": written, **timings}
+
+def build_profiles(profiles, fetch=True, force=False, workers=RENDER_WORKERS):
+    """Fetch into the shared store, then render every profile in parallel; returns the report."""
+    start = time.perf_counter()
+    use_shared_store()
+    if fetch:
+        with trace.span("profiles.fetch_stage"):
+            membership, videos, report = fetch_profiles(profiles)
+    else:
+        membership = load_membership()
+        videos = cached_profile_videos(profiles)
+        report = {"profiles": {profile["name"]: {} for profile in profiles}}
+    report["fetch_seconds"] = round(time.perf_counter() - start, 3)
+
+    render_start = time.perf_counter()
+    shared = (store_module.DB_FILE, store_module.CACHE_FILE)
+    with trace.span("profiles.render_stage"), ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {profile["name"]: pool.submit(render_profile, profile,
+                                                membership.get(profile["name"], {}).get("keys", []),
+                                                videos[profile["name"]], shared, force)
+                   for profile in profiles}
+        for name, future in futures.items():
+            try:
+                report["profiles"][name].update(future.result())
+            except Exception as e:
+                print(f"Error building profile {name}: {e}")
+                report["profiles"][name]["error"] = str(e)
+    report["render_seconds"] = round(time.perf_counter() - render_start, 3)
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["hosts"] = scheduler.stats()
+    return report
+
+def print_report(report):
+    if "ids_total" in report:
+        print(f"Shared store: {report['ids_total']} PubMed IDs, {report['ids_unique']} unique, {report['fetched']} fetched.")
+    for name, row in report["profiles"].items():
+        if "error" in row:
+            print(f"  {name:<24} failed: {row['error']}")
+            continue
+        stages = "  ".join(f"{stage} {row[stage]:>6.2f}s" for stage in ("search", "orcid", "videos", "render")
+                           if stage in row)
+        status = "written" if row.get("written") else "unchanged"
+        print(f"  {name:<24} {row.get('works', 0):>5} works  {stages}  ({status})")
+    print(f"Fetch {report['fetch_seconds']:.2f}s, render {report['render_seconds']:.2f}s, total {report['seconds']:.2f}s.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build one site per profile in profiles.json.")
+    parser.add_argument("--config", default=CONFIG_FILE, help="Profiles file")
+    parser.add_argument("--profile", action="append", help="Build only this profile (repeatable)")
+    parser.add_argument("--render-only", action="store_true", help="Render from the shared store without network access")
+    parser.add_argument("--force", action="store_true", help="Render even if no input changed since the last build")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="Render processes")
+    args = parser.parse_args()
+
+    try:
+        profiles = load_profiles(args.config)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    if args.profile:
+        profiles = [profile for profile in profiles if profile["name"] in args.profile]
+    report = build_profiles(profiles, fetch=not args.render_only, force=args.force, workers=args.workers)
+    print("Profiles:")
+    print_report(report)
+    scheduler.print_stats()
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {os.path.relpath(REPORT_FILE, parent_dir)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Shared request scheduler for every outbound API call (PubMed, ORCID,
+# OpenAI). Each host has a token bucket, so any number of worker threads
+# together stay within that host's published rate limit. A call that gets a
+# 429 or 5xx (or a connection error) is retried with jittered exponential
+# backoff, honouring Retry-After; a 429 also pauses the host's bucket so the
+# other workers back off with it. Counters per host are kept for reports.
+
+NCBI_API_KEY = os.getenv("NCBI_API_KEY")
+NCBI_HOST = "eutils.ncbi.nlm.nih.gov"
+ORCID_HOST = "pub.orcid.org"
+OPENAI_HOST = "api.openai.com"
+
+# host -> (requests per second, burst). NCBI allows 3/s, or 10/s with an API
+# key, counted per second, so its bucket has no burst. Hosts not listed
+# (e.g. the local eutils stub) are not throttled but are still retried.
+RATE_LIMITS = {
+    NCBI_HOST: (10 if NCBI_API_KEY else 3, 1),
+    ORCID_HOST: (24, 40),
+    OPENAI_HOST: (int(os.getenv("OPENAI_RPM", "500")) / 60, 10),
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0    # seconds; doubled per attempt, full jitter
+BACKOFF_MAX = 60.0
+
+class TokenBucket:
+    """Thread-safe token bucket; tokens go negative to queue waiting callers in order."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until it is available; returns the seconds waited."""
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Hold back the next token for at least ``seconds`` (after a 429)."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+_buckets = {}
+_stats = {}
+_lock = threading.Lock()
+
+def host_of(url):
+    return urlparse(url).hostname or url
+
+def bucket_for(host):
+    """The host's shared bucket, or None if it is not rate limited."""
+    with _lock:
+        if host not in _buckets:
+            limit = RATE_LIMITS.get(host)
+            _buckets[host] = TokenBucket(*limit) if limit else None
+        return _buckets[host]
+
+def _count(host, **values):
+    with _lock:
+        stats = _stats.setdefault(host, {"requests": 0, "retries": 0, "throttled": 0, "failed": 0, "queue_wait": 0.0})
+        for name, value in values.items():
+            stats[name] += value
+
+def retry_after(headers):
+    """Seconds requested by a Retry-After header (delta or HTTP date), or None."""
+    value = (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff(attempt, requested=None):
+    """Full-jitter exponential delay, or the server's Retry-After if longer."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, min(requested, BACKOFF_MAX)) if requested is not None else delay
+
+def call(host, send, retry_on=(), retries=MAX_RETRIES):
+    """Run ``send()`` under ``host``'s rate limit, retrying transient failures.
+
+    ``send`` returns a response with ``status_code`` and ``headers``; one with
+    a RETRY_STATUSES code is closed and retried, and the last attempt's
+    response is returned as is. Exceptions of a ``retry_on`` type are
+    retried too (their ``status_code`` and ``response`` are used when
+    present) and re-raised once retries run out.
+    """
+    bucket = bucket_for(host)
+    for attempt in range(retries + 1):
+        _count(host, requests=1, queue_wait=bucket.acquire() if bucket else 0.0)
+        try:
+            resp = send()
+        except retry_on as e:
+            if attempt == retries:
+                _count(host, failed=1)
+                raise
+            status = getattr(e, "status_code", None)
+            requested = retry_after(getattr(getattr(e, "response", None), "headers", None))
+        else:
+            status = resp.status_code
+            if status not in RETRY_STATUSES:
+                return resp
+            if attempt == retries:
+                _count(host, failed=1)
+                return resp
+            requested = retry_after(resp.headers)
+            resp.close()
+
+        delay = backoff(attempt, requested)
+        if status == 429:
+            _count(host, throttled=1)
+            if bucket:
+                bucket.pause(delay)
+        _count(host, retries=1)
+        time.sleep(delay)
+
+def stats():
+    """Per-host counters: requests, retries, throttled (429s), failed, queue_wait seconds."""
+    with _lock:
+        return {host: dict(values) for host, values in _stats.items()}
+
+def print_stats():
+    for host, s in stats().items():
+        print(f"  {host:<26} {s['requests']:>6} requests {s['retries']:>4} retries "
+              f"({s['throttled']} throttled, {s['failed']} failed) {s['queue_wait']:>7.2f}s queued")
@@ -0,0 +1,72 @@
+import base64
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+from scripts.authors import author_text
+
+# Build-time search and filter index for the publication list, served as a
+# static JSON file and read by static/js/search.js. Documents are numbered
+# in page order. Facets are bitsets, base64-encoded with bit i of byte j
+# standing for document 8*j + i; only the theme facet is published, since it
+# is the only one the page has filter buttons for. Text search uses an
+# inverted index over title, authors and journal, whose posting lists are
+# delta-encoded document numbers.
+
+FACETS = ("theme",)
+TEXT_FIELDS = ("title", "authors", "journal")
+
+_TAGS = re.compile(r"<[^>]+>")
+_SPLIT = re.compile(r"[^\w]+")
+
+def tokenize(text):
+    """Lowercased word tokens; must match tokenize() in static/js/search.js."""
+    text = unicodedata.normalize("NFKC", _TAGS.sub(" ", text or "")).lower()
+    return [token for token in _SPLIT.split(text) if token]
+
+def slugify(value):
+    """CSS-class-safe name for a facet value ("Medical AI & Data Science" -> "medical-ai-data-science")."""
+    return "-".join(tokenize(str(value))) or "none"
+
+def field_text(work, field):
+    if field == "authors":
+        return author_text(work.get("authors"))
+    return str(work.get(field) or "")
+
+def facet_bitsets(values):
+    """(distinct values, packed membership bitsets) for one facet column."""
+    distinct, inverse = np.unique(np.array([str(v) for v in values]), return_inverse=True)
+    membership = inverse[None, :] == np.arange(len(distinct))[:, None]
+    packed = np.packbits(membership, axis=1, bitorder="little")
+    return distinct.tolist(), [base64.b64encode(row.tobytes()).decode("ascii") for row in packed]
+
+def inverted_index(works):
+    """token -> delta-encoded sorted document numbers, built in one vectorized pass."""
+    docs = [tokenize(" ".join(field_text(work, field) for field in TEXT_FIELDS)) for work in works]
+    lengths = [len(tokens) for tokens in docs]
+    if not sum(lengths):
+        return {}
+    doc_ids = np.repeat(np.arange(len(docs)), lengths)
+    vocab, token_ids = np.unique(np.array([t for tokens in docs for t in tokens]), return_inverse=True)
+
+    # Unique (token, doc) pairs, sorted by token then document
+    pairs = np.unique(token_ids.astype(np.int64) * len(docs) + doc_ids)
+    tokens, doc_ids = pairs // len(docs), pairs % len(docs)
+    starts = np.flatnonzero(np.r_[True, tokens[1:] != tokens[:-1]])
+    deltas = np.diff(doc_ids, prepend=0)
+    deltas[starts] = doc_ids[starts]
+    return {vocab[tokens[start]]: chunk.tolist()
+            for start, chunk in zip(starts, np.split(deltas, starts[1:]))}
+
+def build_index(works):
+    index = {"count": len(works), "fields": list(TEXT_FIELDS), "facets": {}}
+    for facet in FACETS:
+        values, bits = facet_bitsets([work.get(facet) or "" for work in works])
+        index["facets"][facet] = {"values": values, "slugs": [slugify(v) for v in values], "bits": bits}
+    index["postings"] = inverted_index(works)
+    return index
+
+def encode_index(index):
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
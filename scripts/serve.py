@@ -0,0 +1,231 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import build
+from scripts import shards as sharding
+from scripts.assets import FINGERPRINTED
+
+# Local preview with live reload. The Jinja environment, cached data and
+# rendered output stay in memory; a polling watcher re-renders only what a
+# changed file affects (templates -> page and, for the item/shard
+# templates, shards; the publications cache -> page, changed shards and
+# search index; CSS -> nothing, the stylesheet is swapped in place) and
+# tells open pages over Server-Sent Events. Nothing is fetched and nothing
+# is written to the site's output files; `python build.py` still does the
+# real build.
+
+POLL_INTERVAL = 0.02   # seconds between file checks
+DEV_SHARD_URL = "__dev/pubs"
+# Templates whose change invalidates the rendered shards
+SHARD_TEMPLATES = ("pub_item.html", "pub_shard.html")
+PUBLICATIONS_FILE = os.path.join(parent_dir, 'data', 'publications_cache.json')
+VIDEOS_FILE = os.path.join(parent_dir, 'data', 'videos_cache.json')
+
+LIVE_RELOAD = """<script>
+new EventSource('/__livereload').onmessage = function (e) {
+    if (e.data !== 'css') { location.reload(); return; }
+    document.querySelectorAll('link[rel=stylesheet]').forEach(function (link) {
+        var url = new URL(link.href);
+        if (url.host === location.host) { url.searchParams.set('v', Date.now()); link.href = url; }
+    });
+};
+</script>"""
+
+class DevSite:
+    """Warm in-memory copy of the site, updated per changed file."""
+
+    def __init__(self, inline=None):
+        self.inline = sharding.INLINE_PUBLICATIONS if inline is None else inline
+        self.files = {}        # URL path -> (content type, bytes)
+        self.shard_cache = {}  # shard key -> rendered fragment
+        self.version = 0
+        self.message = None
+        self.changed = threading.Condition()
+        build.get_environment()
+        self.load_publications()
+        self.load_videos()
+        self.render_search_index()
+        self.render()
+
+    # --- data ---
+
+    def load_publications(self):
+        from scripts.store import load_works
+        self.publications = load_works()
+
+    def load_videos(self):
+        from scripts.fetch_youtube import load_cached_videos
+        from scripts.thumbnails import process_thumbnails
+        self.videos = process_thumbnails(load_cached_videos(), fetch=False)
+
+    # --- rendering ---
+
+    def render_search_index(self):
+        from scripts.search_index import build_index, encode_index
+        self.files["/" + build.SEARCH_INDEX] = ("application/json", encode_index(build_index(self.publications)))
+
+    def render(self):
+        """Render the page and any shard not already cached; returns the number of shards rendered."""
+        inline_works, shards = sharding.split_publications(self.publications, self.inline)
+        rendered, live, shard_files = 0, {}, {}
+        for shard in shards:
+            key = sharding.shard_key(shard, "dev")
+            if key not in self.shard_cache:
+                self.shard_cache[key] = build.render_shard(shard).encode('utf-8')
+                rendered += 1
+            live[key] = self.shard_cache[key]
+            shard["src"] = f"{DEV_SHARD_URL}/{shard['year']}.{key[:10]}.html"
+            shard_files["/" + shard["src"]] = ("text/html; charset=utf-8", live[key])
+        self.shard_cache = live
+        # Drop fragments of shards that no longer exist
+        files = {path: entry for path, entry in self.files.items() if not path.startswith(f"/{DEV_SHARD_URL}/")}
+        files.update(shard_files)
+
+        context = build.page_context(inline_works, shards, self.videos, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        html = build.render_page(context).replace("</body>", LIVE_RELOAD + "\n</body>", 1)
+        page = ("text/html; charset=utf-8", html.encode('utf-8'))
+        files["/"] = files["/index.html"] = page
+        self.files = files
+        return rendered
+
+    def apply(self, path):
+        """Update whatever depends on ``path``; returns (live-reload message, description)."""
+        name = os.path.basename(path)
+        if path.endswith(".css"):
+            return "css", "stylesheet"
+        if path.endswith(".js"):
+            return "reload", "script"
+        if path == PUBLICATIONS_FILE:
+            self.load_publications()
+            self.render_search_index()
+            return "reload", f"page, search index, {self.render()} shard(s)"
+        if path == VIDEOS_FILE:
+            self.load_videos()
+            self.render()
+            return "reload", "page"
+        # Templates: jinja's auto_reload recompiles just the changed file
+        if name in SHARD_TEMPLATES:
+            self.shard_cache = {}
+        return "reload", f"page, {self.render()} shard(s)"
+
+    def notify(self, message):
+        with self.changed:
+            self.version += 1
+            self.message = message
+            self.changed.notify_all()
+
+def watched_files():
+    paths = [os.path.join(build.TEMPLATE_DIR, name) for name in os.listdir(build.TEMPLATE_DIR)]
+    paths += [os.path.join(parent_dir, rel_path) for rel_path in FINGERPRINTED]
+    paths += [PUBLICATIONS_FILE, VIDEOS_FILE]
+    return paths
+
+def snapshot():
+    stamps = {}
+    for path in watched_files():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        stamps[path] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+def watch(site, interval=POLL_INTERVAL):
+    """Poll the watched files forever, applying and announcing each change."""
+    previous = snapshot()
+    while True:
+        time.sleep(interval)
+        current = snapshot()
+        changed = [path for path in current if current[path] != previous.get(path)]
+        previous = current
+        if not changed:
+            continue
+        start = time.perf_counter()
+        message = "css"
+        for path in changed:
+            try:
+                result, what = site.apply(path)
+            except Exception as e:
+                print(f"{os.path.relpath(path, parent_dir)}: {e}")
+                continue
+            print(f"{os.path.relpath(path, parent_dir)} changed: {what} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+            if result == "reload":
+                message = "reload"
+        site.notify(message)
+
+def make_handler(site):
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=parent_dir, **kwargs)
+
+        def log_message(self, *args):
+            pass
+
+        def end_headers(self):
+            self.send_header("Cache-Control", "no-store")
+            super().end_headers()
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/__livereload":
+                self.stream_events()
+            elif path in site.files:
+                content_type, body = site.files[path]
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                super().do_GET()
+
+        def stream_events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            seen = site.version
+            try:
+                while True:
+                    with site.changed:
+                        site.changed.wait_for(lambda: site.version != seen, timeout=15)
+                        version, message = site.version, site.message
+                    # A comment line on timeout notices closed tabs
+                    self.wfile.write(f"data: {message}\n\n".encode() if version != seen else b": ping\n\n")
+                    self.wfile.flush()
+                    seen = version
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the site locally, re-rendering on every edit.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--inline", type=int, default=None, help="Works rendered inline (as in build.py)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    site = DevSite(args.inline)
+    print(f"Loaded {len(site.publications)} works and rendered in {time.perf_counter() - start:.2f}s.")
+    threading.Thread(target=watch, args=(site,), name="watcher", daemon=True).start()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(site))
+    server.daemon_threads = True
+    print(f"Serving at http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
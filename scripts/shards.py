@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+
+from scripts.assets import minify_html, precompress, write_if_changed
+
+# Sharded publication rendering. The newest INLINE_PUBLICATIONS works are
+# rendered into index.html; the rest become one HTML fragment per year under
+# static/pubs/, fetched on demand by static/js/search.js. Items in a shard
+# are numbered from 0 and the page's placeholder carries the shard's start,
+# so a new paper only changes the shard it pushes a work into. A shard is
+# only re-rendered when its works or the templates changed; the build
+# manifest maps each shard's key to its file name.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARD_DIR = os.path.join(BASE_DIR, 'static', 'pubs')
+SHARD_URL = "static/pubs"
+# 0 renders every work inline
+INLINE_PUBLICATIONS = 50
+
+def split_publications(publications, inline=INLINE_PUBLICATIONS):
+    """Split newest-first works into (inline works, per-year shards).
+
+    Each shard records ``start``, the page-order number of its first work,
+    which the client adds to the shard-local item numbers to match the
+    search index.
+    """
+    if not inline or len(publications) <= inline:
+        return publications, []
+    shards = []
+    for i, work in enumerate(publications[inline:], start=inline):
+        year = str(work.get('year') or 'undated')
+        if shards and shards[-1]["year"] == year:
+            shards[-1]["works"].append(work)
+        else:
+            shards.append({"year": year, "start": i, "works": [work]})
+    return publications[:inline], shards
+
+def shard_key(shard, templates_hash):
+    encoded = json.dumps([templates_hash, shard["works"]], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def write_shards(shards, render_shard, templates_hash, previous=None):
+    """Write changed shards and set each shard's ``src``.
+
+    ``render_shard(shard)`` returns the fragment HTML; it is only called for
+    shards whose key is not in ``previous`` (the last build's key -> file
+    name map). Returns (new key -> file name map, number of shards rendered).
+    """
+    previous = previous or {}
+    manifest, rendered = {}, 0
+    for shard in shards:
+        key = shard_key(shard, templates_hash)
+        name = previous.get(key)
+        if name is None or not os.path.exists(os.path.join(SHARD_DIR, name)):
+            data = minify_html(render_shard(shard)).encode('utf-8')
+            name = f"{shard['year']}.{hashlib.sha256(data).hexdigest()[:10]}.html"
+            os.makedirs(SHARD_DIR, exist_ok=True)
+            path = os.path.join(SHARD_DIR, name)
+            write_if_changed(path, data)
+            precompress(path, data)
+            rendered += 1
+        manifest[key] = name
+        shard["src"] = f"{SHARD_URL}/{name}"
+    prune(set(manifest.values()))
+    return manifest, rendered
+
+def prune(keep):
+    """Delete shard files (and their .gz/.br siblings) not in ``keep``."""
+    if not os.path.isdir(SHARD_DIR):
+        return
+    for name in os.listdir(SHARD_DIR):
+        if name not in keep and name.rsplit('.', 1)[0] not in keep:
+            os.remove(os.path.join(SHARD_DIR, name))
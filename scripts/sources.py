@@ -0,0 +1,98 @@
+import threading
+import time
+
+# Registry of data sources for the build's fetch stage. Every registered
+# source runs in its own thread, so the stage takes as long as the slowest
+# source rather than the sum of all of them. A source that raises or overruns
+# its deadline is replaced by its fallback (normally the last cached result).
+# An overrun source is also cancelled: its thread cannot be stopped, but the
+# fetch functions call check_cancelled() between batches and before writing
+# caches, so it gives up instead of writing while the fallback is rendered.
+
+SOURCES = {}
+_local = threading.local()
+
+class Cancelled(Exception):
+    """Raised by check_cancelled() in a source that missed its deadline."""
+
+def check_cancelled():
+    """Raise Cancelled if the calling source thread has missed its deadline.
+
+    Does nothing outside a source thread (e.g. when a fetch script is run
+    directly).
+    """
+    cancel = getattr(_local, "cancel", None)
+    if cancel is not None and cancel.is_set():
+        raise Cancelled("deadline passed; not writing late results")
+
+def register_source(name, fetch, deadline=60, fallback=None):
+    """Register ``fetch()`` under ``name``.
+
+    ``deadline`` is in seconds from the start of the stage. ``fallback()`` is
+    called (without network) if the fetch fails or misses its deadline; with
+    no fallback the result is None.
+    """
+    SOURCES[name] = {"fetch": fetch, "deadline": deadline, "fallback": fallback}
+
+def _run(name, source, box, cancel):
+    from scripts import trace
+    _local.cancel = cancel
+    try:
+        with trace.span(f"source.{name}"):
+            box["result"] = source["fetch"]()
+    except Exception as e:
+        box["error"] = e
+    finally:
+        box["finished"] = time.perf_counter()
+
+def run_sources(names=None):
+    """Fetch the named sources (default: all) concurrently.
+
+    Returns ``(results, report)`` where ``report[name]`` holds the status
+    ("ok", "timeout" or "error") and latency in seconds of each source.
+    """
+    names = list(SOURCES) if names is None else names
+    start = time.perf_counter()
+    boxes, threads, cancels = {}, {}, {}
+    for name in names:
+        boxes[name] = {}
+        cancels[name] = threading.Event()
+        # Daemon threads: a source stuck past its deadline must not block exit
+        thread = threading.Thread(target=_run, args=(name, SOURCES[name], boxes[name], cancels[name]),
+                                  name=f"source-{name}", daemon=True)
+        thread.start()
+        threads[name] = thread
+
+    results, report = {}, {}
+    for name in names:
+        source, box = SOURCES[name], boxes[name]
+        remaining = source["deadline"] - (time.perf_counter() - start)
+        threads[name].join(max(remaining, 0))
+
+        if threads[name].is_alive():
+            cancels[name].set()
+            status = "timeout"
+            print(f"Source '{name}' exceeded its {source['deadline']}s deadline; using cached data.")
+        elif "error" in box:
+            status = "error"
+            print(f"Source '{name}' failed ({box['error']}); using cached data.")
+        else:
+            status = "ok"
+
+        if status == "ok":
+            results[name] = box["result"]
+        else:
+            results[name] = source["fallback"]() if source["fallback"] else None
+        elapsed = box.get("finished", time.perf_counter()) - start
+        report[name] = {"status": status, "seconds": round(elapsed, 3)}
+
+    return results, report
+
+def load_cached(names=None):
+    """Results from every named source's fallback, without any network access."""
+    names = list(SOURCES) if names is None else names
+    return {name: SOURCES[name]["fallback"]() if SOURCES[name]["fallback"] else None for name in names}
+
+def print_report(report):
+    for name, entry in report.items():
+        print(f"  {name:<14} {entry['status']:<8} {entry['seconds']:>8.2f}s")
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+
+# Add the parent directory to sys.path to allow imports from scripts
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.authors import migrate_work
+
+# SQLite-backed publication store.
+#
+# data/publications.db is the working store: indexed on pmid, doi, year,
+# theme and category, with single-record transactional upserts that only
+# touch rows whose content actually changed. data/publications_cache.json
+# stays as the committed, hand-editable export; whenever it differs from
+# what the store last wrote, the edits are imported back on open. Records
+# still using pre-rendered author strings are migrated on import.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DB_FILE = os.path.join(DATA_DIR, 'publications.db')
+CACHE_FILE = os.path.join(DATA_DIR, 'publications_cache.json')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    key TEXT PRIMARY KEY,
+    pmid TEXT,
+    doi TEXT,
+    year INTEGER,
+    theme TEXT,
+    category TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_works_pmid ON works(pmid);
+CREATE INDEX IF NOT EXISTS idx_works_doi ON works(doi);
+CREATE INDEX IF NOT EXISTS idx_works_year ON works(year);
+CREATE INDEX IF NOT EXISTS idx_works_theme ON works(theme);
+CREATE INDEX IF NOT EXISTS idx_works_category ON works(category);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def _encode(work):
+    return json.dumps(work, ensure_ascii=False)
+
+# Innermost arrays (author rows) are kept on one line in the export
+_SCALAR_ARRAY = re.compile(r"\[\s+([^\[\]{}]*?)\s+\]")
+
+def _dump_export(data, f):
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    f.write(_SCALAR_ARRAY.sub(lambda m: "[" + re.sub(r"\s*\n\s*", " ", m.group(1)) + "]", text))
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class PublicationStore:
+    """Indexed store of works keyed like the JSON cache (PMID for PubMed records)."""
+
+    def __init__(self, db_path=None, json_path=None, sync=True):
+        # Resolved at call time so tools can point the module at other files
+        self.db_path = db_path or DB_FILE
+        self.json_path = json_path or CACHE_FILE
+        self.dirty = False
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+        if sync:
+            self.sync_from_json()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def __contains__(self, key):
+        return self.conn.execute("SELECT 1 FROM works WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+    # --- meta ---
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    # --- reads ---
+
+    def get(self, key):
+        row = self.conn.execute("SELECT data FROM works WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_doi(self, doi):
+        row = self.conn.execute("SELECT data FROM works WHERE doi = ? COLLATE NOCASE", (doi,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, year=None, theme=None, category=None):
+        """Works matching every given field, newest first."""
+        clauses, args = [], []
+        for column, value in (("year", year), ("theme", theme), ("category", category)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(f"SELECT data FROM works {where} ORDER BY year DESC, rowid", args)
+        return [json.loads(data) for (data,) in rows]
+
+    def ids(self):
+        """(key, pmid, doi) for every work, without decoding the records."""
+        return self.conn.execute("SELECT key, pmid, doi FROM works ORDER BY rowid").fetchall()
+
+    def select(self, keys):
+        """The works stored under ``keys``, newest first (missing keys are skipped)."""
+        rows = self.conn.execute(
+            "SELECT data FROM works WHERE key IN (SELECT value FROM json_each(?)) ORDER BY year DESC, rowid",
+            (json.dumps(sorted(keys)),))
+        return [json.loads(data) for (data,) in rows]
+
+    def keys(self):
+        return [key for (key,) in self.conn.execute("SELECT key FROM works ORDER BY rowid")]
+
+    def iter_by_year(self):
+        """Yield works newest first, decoding one row at a time."""
+        for (data,) in self.conn.execute("SELECT data FROM works ORDER BY year DESC, rowid"):
+            yield json.loads(data)
+
+    def all_works(self):
+        return list(self.iter_by_year())
+
+    def as_dict(self):
+        return {key: json.loads(data) for key, data in self.conn.execute("SELECT key, data FROM works ORDER BY rowid")}
+
+    # --- writes ---
+
+    def _upsert(self, key, work):
+        encoded = _encode(work)
+        row = self.conn.execute("SELECT data FROM works WHERE key = ?", (key,)).fetchone()
+        if row and row[0] == encoded:
+            return False
+        self.conn.execute(
+            """INSERT INTO works (key, pmid, doi, year, theme, category, data)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET
+                   pmid = excluded.pmid, doi = excluded.doi, year = excluded.year,
+                   theme = excluded.theme, category = excluded.category, data = excluded.data""",
+            (key, work.get('pmid'), work.get('doi'), work.get('year'), work.get('theme'), work.get('category'), encoded)
+        )
+        return True
+
+    def upsert(self, key, work):
+        """Insert or update one record in its own transaction; returns True if the row changed."""
+        with self.conn:
+            changed = self._upsert(key, work)
+        self.dirty = self.dirty or changed
+        return changed
+
+    def upsert_many(self, items):
+        """Upsert ``(key, work)`` pairs in a single transaction; returns the number of changed rows."""
+        with self.conn:
+            changed = sum(self._upsert(key, work) for key, work in items)
+        self.dirty = self.dirty or changed > 0
+        return changed
+
+    def delete(self, key):
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM works WHERE key = ?", (key,)).rowcount
+        self.dirty = self.dirty or deleted > 0
+        return deleted > 0
+
+    # --- JSON interchange ---
+
+    def sync_from_json(self):
+        """Import the JSON cache if it changed since the store last wrote or read it."""
+        if not os.path.exists(self.json_path):
+            return 0
+        digest = _file_hash(self.json_path)
+        if digest == self.get_meta('json_hash'):
+            return 0
+        changed = self.import_json(self.json_path)
+        if self.dirty:
+            # Migrated records: rewrite the export so the migration sticks
+            self.export_json()
+        else:
+            self.set_meta('json_hash', digest)
+        return changed
+
+    def import_json(self, path):
+        """Make the store mirror a JSON cache file, touching only rows that differ."""
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        migrated = {key: migrate_work(work) for key, work in cache.items()}
+        if any(migrated[key] is not cache[key] for key in cache):
+            # The export must be rewritten in the new format on the next save
+            print("Migrated pre-rendered author strings to structured author lists.")
+            self.dirty = True
+        cache = migrated
+        with self.conn:
+            changed = sum(self._upsert(key, work) for key, work in cache.items())
+            stale = [key for key in self.keys() if key not in cache]
+            for key in stale:
+                self.conn.execute("DELETE FROM works WHERE key = ?", (key,))
+        if changed or stale:
+            print(f"Imported {changed} changed and removed {len(stale)} deleted record(s) from {os.path.basename(path)}.")
+        return changed + len(stale)
+
+    def export_json(self, path=None):
+        """Write the store out in the publications_cache.json format."""
+        path = path or self.json_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            _dump_export(self.as_dict(), f)
+        if path == self.json_path:
+            self.set_meta('json_hash', _file_hash(path))
+            self.dirty = False
+
+    def save(self):
+        """Refresh the JSON export if any record changed since the last save."""
+        if self.dirty:
+            self.export_json()
+
+def load_works():
+    """All cached works, newest first, without touching the network."""
+    with PublicationStore() as store:
+        return store.all_works()
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "migrate":
+        # One-shot rebuild of the database from the JSON cache
+        if os.path.exists(DB_FILE):
+            os.remove(DB_FILE)
+        with PublicationStore() as store:
+            print(f"Migrated {len(store)} records into {DB_FILE}.")
+    elif command == "export":
+        with PublicationStore(sync=False) as store:
+            path = sys.argv[2] if len(sys.argv) > 2 else CACHE_FILE
+            store.export_json(path)
+            print(f"Exported {len(store)} records to {path}.")
+    elif command == "import":
+        with PublicationStore(sync=False) as store:
+            path = sys.argv[2] if len(sys.argv) > 2 else CACHE_FILE
+            store.import_json(path)
+            if path == CACHE_FILE:
+                store.set_meta('json_hash', _file_hash(path))
+    elif command == "stats":
+        with PublicationStore() as store:
+            print(f"{len(store)} records")
+            for theme, count in store.conn.execute("SELECT theme, COUNT(*) FROM works GROUP BY theme ORDER BY 2 DESC"):
+                print(f"  {theme}: {count}")
+    else:
+        print("Usage: python scripts/store.py [migrate|export [path]|import [path]|stats]")
+
+if __name__ == "__main__":
+    main()
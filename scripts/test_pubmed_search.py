@@ -1,5 +1,14 @@
-import requests
+import os
+import sys
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
 import json
+from scripts import http_client
+from scripts.fetch_pubmed import EUTILS_BASE, iter_search_ids
 
 # Try different search terms to see what works best
 TERMS = [
@@ -9,31 +18,19 @@ TERMS = [
 ]
 
 def search_pubmed(term):
-    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    params = {
-        "db": "pubmed",
-        "term": term,
-        "retmode": "json",
-        "retmax": 50
-    }
-    try:
-        resp = requests.get(url, params=params)
-        if resp.status_code == 200:
-            return resp.json().get('esearchresult', {}).get('idlist', [])
-    except Exception as e:
-        print(f"Error: {e}")
-    return []
+    # Pages through every hit; very broad queries are split into date windows
+    return list(iter_search_ids(term))
 
 def fetch_summaries(ids):
     if not ids: return []
-    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+    url = f"{EUTILS_BASE}/esummary.fcgi"
     params = {
         "db": "pubmed",
         "id": ",".join(ids),
         "retmode": "json"
     }
     try:
-        resp = requests.get(url, params=params)
+        resp = http_client.get(url, params=params)
         if resp.status_code == 200:
             return resp.json().get('result', {})
     except Exception as e:
@@ -48,7 +45,7 @@ def main():
         
         if ids:
             # Fetch details for first 5 to verify author match
-            summaries = fetch_summaries(ids)
+            summaries = fetch_summaries(ids[:5])
             for uid in ids[:5]:
                 if uid in summaries:
                     item = summaries[uid]
@@ -0,0 +1,30 @@
+import re
+
+# Shared theme vocabulary for the LLM prompt (assign_themes.py) and the
+# offline classifier (classify_themes.py).
+
+THEMES = [
+    "Medical AI & Data Science",
+    "Pharmacology & Precision Med.",
+    "Neuroscience",
+    "Education & Public Health"
+]
+
+# The explicit rules from the LLM prompt, checked in order; first match wins.
+KEYWORD_RULES = [
+    ("Education & Public Health", re.compile(r"\b(curricul\w*|students?|teaching|education\w*|assignments?|flipped class\w*)\b")),
+    ("Pharmacology & Precision Med.", re.compile(r"\b(drug metabolism|pharmacokinetic\w*|pk|cyp\w*|dosage)\b")),
+    ("Neuroscience", re.compile(r"\b(brain|depressi\w*|autis\w*|neurons?|neuronal)\b")),
+    ("Medical AI & Data Science", re.compile(r"\b(ai|artificial intelligence|llms?|large language models?|chatgpt|gpt\w*)\b")),
+]
+
+def normalize_title(title):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", (title or "").lower())).strip()
+
+def match_rules(title):
+    """Theme forced by the keyword rules, or None if no rule applies."""
+    text = normalize_title(title)
+    for theme, pattern in KEYWORD_RULES:
+        if pattern.search(text):
+            return theme
+    return None
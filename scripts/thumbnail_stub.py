@@ -0,0 +1,91 @@
+import argparse
+import hashlib
+import io
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+# Local stand-in for img.youtube.com, so the thumbnail pipeline can be run
+# without touching YouTube. Every /vi/<video id>/hqdefault.jpg is a 480x360
+# JPEG with hqdefault's black letterbox bars around a 16:9 picture whose
+# colour depends on the video ID. IDs listed as missing answer 404.
+
+WIDTH, HEIGHT = 480, 360
+PICTURE_HEIGHT = 270   # 16:9 inside the 4:3 frame
+
+_images = {}
+_lock = threading.Lock()
+
+def thumbnail_bytes(video_id):
+    """Deterministic letterboxed JPEG for ``video_id``."""
+    from PIL import Image
+
+    with _lock:
+        if video_id not in _images:
+            digest = hashlib.sha256(video_id.encode("utf-8")).digest()
+            image = Image.new("RGB", (WIDTH, HEIGHT), (0, 0, 0))
+            image.paste(Image.new("RGB", (WIDTH, PICTURE_HEIGHT), tuple(digest[:3])),
+                        (0, (HEIGHT - PICTURE_HEIGHT) // 2))
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=90)
+            _images[video_id] = buffer.getvalue()
+        return _images[video_id]
+
+class StubHandler(BaseHTTPRequestHandler):
+    missing = frozenset()
+    latency = 0.0
+    calls = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlparse(self.path).path.strip("/").split("/")
+        with _lock:
+            self.calls[self.path] = self.calls.get(self.path, 0) + 1
+        if len(parts) != 3 or parts[0] != "vi" or parts[2] != "hqdefault.jpg" or parts[1] in self.missing:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data = thumbnail_bytes(parts[1])
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def start_stub(port=0, missing=(), latency=0.0):
+    """Serve thumbnails in a background thread; returns (server, base_url, calls).
+
+    ``base_url`` is the value for YOUTUBE_THUMBNAIL_BASE; ``calls`` counts
+    requests per path.
+    """
+    calls = {}
+    handler = type("Handler", (StubHandler,), {"missing": frozenset(missing), "latency": latency, "calls": calls})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/vi", calls
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stand-in YouTube thumbnails.")
+    parser.add_argument("--port", type=int, default=8809)
+    parser.add_argument("--missing", action="append", default=[], help="Video ID to answer with 404 (repeatable)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay added to every request")
+    args = parser.parse_args()
+
+    server, base_url, _ = start_stub(args.port, args.missing, args.latency)
+    print(f"Serving thumbnails at {base_url}")
+    print(f"Point the scripts at it with: YOUTUBE_THUMBNAIL_BASE={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import date
+
+# Add the parent directory to sys.path to allow imports from scripts
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scripts import trace
+from scripts.sources import check_cancelled
+
+# Local copies of the video thumbnails. Each source image is downloaded once,
+# cropped from YouTube's letterboxed 4:3 frame to 16:9 and stored as resized
+# WebP and JPEG variants under static/thumbs/, named by the hash of the
+# source bytes. data/thumbnails.json maps video IDs to their variants so
+# later builds skip images that were already processed.
+#
+# Downloads happen in the build's videos source (download_thumbnails), under
+# its deadline and a FETCH_BUDGET of their own; rendering only attaches what
+# is on disk. A failed download is recorded in the manifest and not retried
+# for RETRY_FAILED_DAYS. scripts/thumbnail_stub.py serves stand-in images for
+# testing (YOUTUBE_THUMBNAIL_BASE). Functions touching files default to
+# THUMB_DIR and MANIFEST_FILE; a multi-profile build passes each profile's
+# own to download_thumbnails from its fetch threads.
+
+THUMBNAIL_BASE = os.getenv("YOUTUBE_THUMBNAIL_BASE", "https://img.youtube.com/vi")
+THUMB_DIR = os.path.join(parent_dir, 'static', 'thumbs')
+THUMB_URL = "static/thumbs"
+MANIFEST_FILE = os.path.join(parent_dir, 'data', 'thumbnails.json')
+
+WIDTHS = (320, 480)
+ASPECT = 16 / 9
+WEBP_QUALITY = 75
+JPEG_QUALITY = 80
+# Cards are a third of the content column on wide screens, full width on phones
+SIZES = "(max-width: 600px) 100vw, 320px"
+
+# Seconds all downloads of one run may take; the rest wait for the next run
+FETCH_BUDGET = 15
+DOWNLOAD_TIMEOUT = (3, 10)
+DOWNLOAD_RETRIES = 1
+RETRY_FAILED_DAYS = 7
+
+def thumbnail_url(video_id):
+    return f"{THUMBNAIL_BASE}/{video_id}/hqdefault.jpg"
+
+def load_manifest(manifest_file=None):
+    manifest_file = manifest_file or MANIFEST_FILE
+    if os.path.exists(manifest_file):
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(manifest, manifest_file=None):
+    manifest_file = manifest_file or MANIFEST_FILE
+    os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def variant_name(digest, width, ext):
+    return f"{digest[:16]}-{width}.{ext}"
+
+def is_processed(entry, thumb_dir=None):
+    thumb_dir = thumb_dir or THUMB_DIR
+    return bool(entry) and bool(entry.get("files")) and all(
+        os.path.exists(os.path.join(thumb_dir, name)) for name in entry["files"]
+    )
+
+def recently_failed(entry, today=None):
+    """True while a recorded download failure is younger than RETRY_FAILED_DAYS."""
+    if not entry or "failed" not in entry:
+        return False
+    today = today or date.today()
+    return (today - date.fromisoformat(entry["failed"])).days < RETRY_FAILED_DAYS
+
+def crop_to_aspect(image):
+    """Center-crop to ASPECT, trimming hqdefault's black letterbox bars."""
+    width, height = image.size
+    target = round(width / ASPECT)
+    if target >= height:
+        return image
+    top = (height - target) // 2
+    return image.crop((0, top, width, top + target))
+
+def make_variants(data, thumb_dir=None):
+    """Write the WebP/JPEG variants of one source image; returns its manifest entry."""
+    from PIL import Image
+
+    thumb_dir = thumb_dir or THUMB_DIR
+    digest = hashlib.sha256(data).hexdigest()
+    image = crop_to_aspect(Image.open(io.BytesIO(data)).convert("RGB"))
+    os.makedirs(thumb_dir, exist_ok=True)
+
+    files, widths = [], []
+    for width in WIDTHS:
+        if width > image.width and widths:
+            break
+        width = min(width, image.width)
+        height = round(width * image.height / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        for ext, options in (("webp", {"quality": WEBP_QUALITY, "method": 6}),
+                             ("jpg", {"quality": JPEG_QUALITY, "optimize": True, "progressive": True})):
+            name = variant_name(digest, width, ext)
+            path = os.path.join(thumb_dir, name)
+            # Content-addressed: identical source bytes never get encoded twice
+            if not os.path.exists(path):
+                resized.save(path, "WEBP" if ext == "webp" else "JPEG", **options)
+            files.append(name)
+        widths.append([width, height])
+    return {"digest": digest, "widths": widths, "files": files, "source_bytes": len(data)}
+
+def image_attrs(entry):
+    """Template attributes (src, srcset, width, height) for a manifest entry."""
+    digest = entry["digest"]
+
+    def srcset(ext):
+        return ", ".join(f"{THUMB_URL}/{variant_name(digest, w, ext)} {w}w" for w, _ in entry["widths"])
+
+    width, height = entry["widths"][0]
+    return {
+        "src": f"{THUMB_URL}/{variant_name(digest, width, 'jpg')}",
+        "srcset_webp": srcset("webp"),
+        "srcset_jpeg": srcset("jpg"),
+        "sizes": SIZES,
+        "width": width,
+        "height": height
+    }
+
+def download_thumbnails(videos, budget=FETCH_BUDGET, thumb_dir=None, manifest_file=None):
+    """Download and convert missing thumbnails; returns the number processed.
+
+    Stops starting downloads once ``budget`` seconds have passed. A failure
+    is recorded so the video is skipped until RETRY_FAILED_DAYS have passed.
+    Variants no longer referenced by any listed video are removed.
+    """
+    from scripts import http_client
+
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_file)
+    changed, processed = False, 0
+    for video in videos:
+        video_id = video["video_id"]
+        entry = manifest.get(video_id)
+        if is_processed(entry, thumb_dir) or recently_failed(entry):
+            continue
+        if time.perf_counter() - start > budget:
+            print(f"Thumbnail budget of {budget}s used up; the rest are left for the next run.")
+            break
+        trace.count("thumbnails.processed")
+        try:
+            resp = http_client.get(thumbnail_url(video_id), use_cache=False,
+                                   timeout=DOWNLOAD_TIMEOUT, retries=DOWNLOAD_RETRIES)
+            resp.raise_for_status()
+            check_cancelled()
+            manifest[video_id] = make_variants(resp.content, thumb_dir)
+            processed += 1
+            print(f"Processed thumbnail for {video_id}.")
+        except Exception as e:
+            check_cancelled()
+            trace.count("thumbnails.failed")
+            print(f"Error processing thumbnail for {video_id}: {e}")
+            manifest[video_id] = {"failed": date.today().isoformat(), "error": str(e)[:200]}
+        changed = True
+
+    if videos:
+        current = {v["video_id"] for v in videos}
+        stale = [video_id for video_id in manifest if video_id not in current]
+        for video_id in stale:
+            del manifest[video_id]
+        changed = changed or bool(stale)
+        check_cancelled()
+        prune(manifest, thumb_dir)
+
+    if changed:
+        check_cancelled()
+        save_manifest(manifest, manifest_file)
+    return processed
+
+def process_thumbnails(videos, fetch=False):
+    """Attach local ``image`` attributes to each video that has processed variants.
+
+    With ``fetch`` missing ones are downloaded first (download_thumbnails);
+    a video without variants keeps hot-linking ``thumbnail``.
+    """
+    if fetch:
+        download_thumbnails(videos)
+    manifest = load_manifest()
+    for video in videos:
+        entry = manifest.get(video["video_id"])
+        if is_processed(entry):
+            video["image"] = image_attrs(entry)
+    return videos
+
+def prune(manifest, thumb_dir=None):
+    """Delete variant files that no manifest entry references."""
+    thumb_dir = thumb_dir or THUMB_DIR
+    if not os.path.isdir(thumb_dir):
+        return
+    keep = {name for entry in manifest.values() for name in entry.get("files", [])}
+    for name in os.listdir(thumb_dir):
+        if name not in keep:
+            os.remove(os.path.join(thumb_dir, name))
+
+def main():
+    from scripts.fetch_youtube import load_cached_videos
+
+    videos = process_thumbnails(load_cached_videos(), fetch=True)
+    manifest = load_manifest()
+    for video in videos:
+        entry = manifest.get(video["video_id"])
+        if not is_processed(entry):
+            failed = f" (failed {entry['failed']}: {entry['error']})" if entry and "failed" in entry else ""
+            print(f"{video['video_id']}: not processed{failed}")
+            continue
+        sizes = {name: os.path.getsize(os.path.join(THUMB_DIR, name)) for name in entry["files"]}
+        print(f"{video['video_id']}: source {entry['source_bytes']} B -> " +
+              ", ".join(f"{name} {size} B" for name, size in sizes.items()))
+
+if __name__ == "__main__":
+    main()
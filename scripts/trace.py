@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Lightweight build instrumentation: timed spans (nested per thread) and
+# named counters such as HTTP requests, bytes, cache hits and misses. write()
+# saves them as a JSON trace, or in Chrome trace-event format for
+# chrome://tracing / Perfetto, and can append a one-line summary to a
+# history file so stage timings can be followed across runs.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACE_DIR = os.path.join(BASE_DIR, '.cache', 'trace')
+# Kept in the Actions cache, not committed, so a run alone never changes the site
+HISTORY_FILE = os.path.join(TRACE_DIR, 'history.jsonl')
+HISTORY_LIMIT = 200   # runs kept in the history file
+
+_lock = threading.Lock()
+_origin = time.perf_counter()
+_started = datetime.now(timezone.utc)
+_spans = []
+_counters = {}
+_local = threading.local()
+
+@contextmanager
+def span(name, **args):
+    """Time the enclosed block as ``name``; ``args`` are attached to the span."""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        end = time.perf_counter()
+        stack.pop()
+        record = {"name": name, "start": round(start - _origin, 6), "duration": round(end - start, 6),
+                  "depth": len(stack), "thread": threading.current_thread().name}
+        if args:
+            record["args"] = args
+        with _lock:
+            _spans.append(record)
+
+def count(name, value=1):
+    """Add ``value`` to counter ``name`` (e.g. "http.requests", "http.cache_hit")."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+def summary():
+    """Main-thread top-level span durations, per-name totals over all spans and threads, and every counter."""
+    with _lock:
+        stages, totals = {}, {}
+        for record in _spans:
+            if record["depth"] == 0 and record["thread"] == "MainThread":
+                stages[record["name"]] = round(stages.get(record["name"], 0) + record["duration"], 4)
+            totals[record["name"]] = round(totals.get(record["name"], 0) + record["duration"], 4)
+        return {"stages": stages, "span_totals": dict(sorted(totals.items())), "counters": dict(sorted(_counters.items()))}
+
+def trace_data():
+    from scripts import scheduler
+    with _lock:
+        spans = sorted(_spans, key=lambda s: s["start"])
+    return {
+        "started": _started.isoformat(timespec="seconds"),
+        "seconds": round(time.perf_counter() - _origin, 4),
+        "spans": spans,
+        **summary(),
+        "hosts": scheduler.stats(),
+    }
+
+def chrome_events(data):
+    """Chrome trace-event format: one complete ("X") event per span, counters as metadata."""
+    threads = {name: tid for tid, name in enumerate(dict.fromkeys(s["thread"] for s in data["spans"]), start=1)}
+    events = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+              for name, tid in threads.items()]
+    for s in data["spans"]:
+        events.append({"name": s["name"], "ph": "X", "pid": 1, "tid": threads[s["thread"]],
+                       "ts": round(s["start"] * 1e6), "dur": round(s["duration"] * 1e6), "args": s.get("args", {})})
+    return {"traceEvents": events, "displayTimeUnit": "ms",
+            "otherData": {"started": data["started"], "counters": data["counters"], "hosts": data["hosts"]}}
+
+def write(name, path=None, chrome=False, history=None):
+    """Write the trace to ``path`` (default .cache/trace/<name>.json); returns the path.
+
+    With ``history`` (a file path) a summary line is appended there, keeping
+    the last HISTORY_LIMIT runs.
+    """
+    data = trace_data()
+    path = path or os.path.join(TRACE_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(chrome_events(data) if chrome else data, f, indent=1)
+
+    if history:
+        line = json.dumps({"name": name, "started": data["started"], "seconds": data["seconds"],
+                           "stages": data["stages"], "span_totals": data["span_totals"],
+                           "counters": data["counters"]}, sort_keys=True)
+        lines = []
+        if os.path.exists(history):
+            with open(history, 'r', encoding='utf-8') as f:
+                lines = [l.rstrip('\n') for l in f if l.strip()]
+        lines = (lines + [line])[-HISTORY_LIMIT:]
+        os.makedirs(os.path.dirname(history), exist_ok=True)
+        with open(history, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+    return path
+
+def print_summary():
+    s = summary()
+    for name, seconds in s["stages"].items():
+        print(f"  {name:<26} {seconds:>8.2f}s")
+    if s["counters"]:
+        print("  " + ", ".join(f"{name}={value:,}" for name, value in s["counters"].items()))
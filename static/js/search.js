@@ -0,0 +1,186 @@
+// Publication filter and instant search backed by the build-time index
+// (scripts/search_index.py). Filtering sets one class on the list; search
+// only touches the items whose match state changed. Older works arrive as
+// per-year shards (scripts/shards.py), loaded on click or when needed.
+(function () {
+    const list = document.querySelector('.pub-list');
+    if (!list) {
+        return;
+    }
+    let items = [];
+    const input = document.querySelector('.pub-search');
+    const counter = document.querySelector('.pub-count');
+    const filterBtns = document.querySelectorAll('.filter-btn');
+
+    let indexPromise = null;
+    let filter = 'all';
+    let hits = new Set();
+    let shardsPromise = null;
+
+    // Items by page-order number, matching the index's document numbers
+    function collectItems() {
+        items = [];
+        list.querySelectorAll('.pub-item').forEach(item => {
+            items[Number(item.getAttribute('data-i'))] = item;
+        });
+    }
+
+    function loadShard(shard) {
+        if (!shard.loading) {
+            shard.loading = fetch(shard.getAttribute('data-src'))
+                .then(resp => resp.text())
+                .then(html => {
+                    const fragment = document.createElement('template');
+                    fragment.innerHTML = html;
+                    // Shard items are numbered from 0; make them page-order numbers
+                    const start = Number(shard.getAttribute('data-start'));
+                    fragment.content.querySelectorAll('.pub-item').forEach(item => {
+                        item.setAttribute('data-i', start + Number(item.getAttribute('data-i')));
+                    });
+                    shard.replaceWith(fragment.content);
+                });
+        }
+        return shard.loading;
+    }
+
+    // Search and filters need every work in the DOM
+    function loadAllShards() {
+        if (!shardsPromise) {
+            const shards = Array.from(list.querySelectorAll('.pub-shard'));
+            shardsPromise = Promise.all(shards.map(loadShard)).then(collectItems);
+        }
+        return shardsPromise;
+    }
+
+    collectItems();
+    list.querySelectorAll('.pub-shard').forEach(shard => {
+        shard.querySelector('button').addEventListener('click', () => loadShard(shard).then(collectItems));
+    });
+
+    function tokenize(text) {
+        return text.normalize('NFKC').toLowerCase().split(/[^\p{L}\p{N}_]+/u).filter(Boolean);
+    }
+
+    function decodeBits(encoded) {
+        const raw = atob(encoded);
+        const bytes = new Uint8Array(raw.length);
+        for (let i = 0; i < raw.length; i++) {
+            bytes[i] = raw.charCodeAt(i);
+        }
+        return bytes;
+    }
+
+    function loadIndex() {
+        if (!indexPromise) {
+            indexPromise = fetch(list.getAttribute('data-index'))
+                .then(resp => resp.json())
+                .then(index => {
+                    index.vocab = Object.keys(index.postings).sort();
+                    const theme = index.facets.theme;
+                    index.themeBits = {};
+                    theme.slugs.forEach((slug, i) => {
+                        index.themeBits[slug] = decodeBits(theme.bits[i]);
+                    });
+                    return index;
+                });
+        }
+        return indexPromise;
+    }
+
+    // Documents containing a token that starts with ``prefix``
+    function prefixMatches(index, prefix) {
+        const vocab = index.vocab;
+        let lo = 0, hi = vocab.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (vocab[mid] < prefix) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        const docs = new Set();
+        for (let i = lo; i < vocab.length && vocab[i].startsWith(prefix); i++) {
+            let doc = 0;
+            index.postings[vocab[i]].forEach(delta => {
+                doc += delta;
+                docs.add(doc);
+            });
+        }
+        return docs;
+    }
+
+    function search(index, query) {
+        let result = null;
+        tokenize(query).forEach(term => {
+            const docs = prefixMatches(index, term);
+            result = result === null ? docs : new Set([...result].filter(doc => docs.has(doc)));
+        });
+        return result;
+    }
+
+    function inFilter(index, doc) {
+        if (filter === 'all') {
+            return true;
+        }
+        const bits = index.themeBits[filter];
+        return Boolean(bits && bits[doc >> 3] & (1 << (doc & 7)));
+    }
+
+    function updateCount(index, result) {
+        if (!counter) {
+            return;
+        }
+        if (result === null) {
+            counter.textContent = '';
+            return;
+        }
+        let count = 0;
+        result.forEach(doc => {
+            count += inFilter(index, doc) ? 1 : 0;
+        });
+        counter.textContent = count + ' / ' + index.count;
+    }
+
+    function applySearch() {
+        Promise.all([loadIndex(), loadAllShards()]).then(([index]) => {
+            const result = search(index, input.value);
+            const next = result || new Set();
+            hits.forEach(doc => {
+                if (!next.has(doc)) {
+                    items[doc].classList.remove('hit');
+                }
+            });
+            next.forEach(doc => {
+                if (!hits.has(doc)) {
+                    items[doc].classList.add('hit');
+                }
+            });
+            hits = next;
+            list.classList.toggle('searching', result !== null);
+            updateCount(index, result);
+        });
+    }
+
+    filterBtns.forEach(btn => {
+        btn.addEventListener('click', () => {
+            filterBtns.forEach(b => b.classList.remove('active'));
+            btn.classList.add('active');
+            list.classList.remove('only-' + filter);
+            filter = btn.getAttribute('data-filter');
+            if (filter !== 'all') {
+                list.classList.add('only-' + filter);
+                loadAllShards();
+            }
+            if (input && input.value) {
+                applySearch();
+            }
+        });
+    });
+
+    if (input) {
+        input.addEventListener('input', applySearch);
+        // Start downloading the index as soon as the visitor shows interest
+        input.addEventListener('focus', loadIndex, { once: true });
+    }
+})();